@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import zlib
+from collections.abc import Iterator
+from typing import Any
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MIN_COMPRESS_BYTES = 1024
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    if "zstd" in accepted and zstandard is not None:
+        return "zstd"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=3).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._obj = zlib.compressobj(6, zlib.DEFLATED, 31)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(self._flush_mode)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def _headers(encoding: str | None) -> dict[str, str]:
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return headers
+
+
+def encoded_response(body: bytes, media_type: str, encoding: str | None) -> Response:
+    if len(body) < MIN_COMPRESS_BYTES:
+        encoding = None
+    if encoding is not None:
+        compressor = StreamCompressor(encoding)
+        body = compressor.compress(body) + compressor.finish()
+    return Response(content=body, media_type=media_type, headers=_headers(encoding))
+
+
+def compress_stream(chunks: Iterator[bytes], encoding: str | None) -> Iterator[bytes]:
+    if encoding is None:
+        yield from chunks
+        return
+    compressor = StreamCompressor(encoding)
+    for chunk in chunks:
+        yield compressor.compress(chunk)
+    yield compressor.finish()
+
+
+def stream_headers(encoding: str | None) -> dict[str, str]:
+    return _headers(encoding)
@@ -1,17 +1,29 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, Request
+import json
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from starlette.concurrency import run_in_threadpool
 
+from app.api.encoding import choose_encoding, compress_stream, dumps, encoded_response, stream_headers
 from app.models.schemas import (
+    BacklinksResponse,
+    BatchClassifyRequest,
+    BatchClassifyResponse,
+    BatchSemanticSearchRequest,
+    BatchSemanticSearchResponse,
     ClassifyRequest,
     ClassifyResponse,
     GraphResponse,
     HealthResponse,
+    IndexJobStatus,
     IndexRequest,
     IndexResponse,
     QueryRequest,
     QueryResponse,
+    ReadyResponse,
     SemanticSearchResponse,
     SummarizeRequest,
 )
@@ -32,47 +44,162 @@ async def health(request: Request) -> HealthResponse:
     c = _container(request)
     return HealthResponse(
         status="ok",
-        qdrant_ok=c.qdrant.health(),
+        qdrant_ok=await c.qdrant.health(),
         watcher_running=c.watcher.running,
-        metadata={"collection": c.qdrant.collection_name},
+        metadata={
+            "collection": c.qdrant.collection_name,
+            "embedding_cache": c.embedder.cache_stats(),
+            "embedding_batcher": c.batcher.stats(),
+            "query_cache": c.rag.cache_stats(),
+            "generation": c.rag.scheduler.stats(),
+        },
     )
 
 
-@router.post("/index", response_model=IndexResponse)
+@router.get("/ready", response_model=ReadyResponse)
+async def ready(request: Request, response: Response) -> ReadyResponse:
+    c = _container(request)
+    if not c.readiness.ready:
+        response.status_code = 503
+    return ReadyResponse(ready=c.readiness.ready, components=c.readiness.snapshot())
+
+
+@router.post("/index", response_model=IndexResponse, status_code=202)
 async def index_docs(payload: IndexRequest, request: Request) -> IndexResponse:
     c = _container(request)
-    stats = await c.indexer.full_index()
-    return IndexResponse(status="indexed", stats=stats)
+    job = c.jobs.submit(force_full=payload.force_full)
+    return IndexResponse(status=job.status, job_id=job.job_id)
+
+
+@router.get("/index/{job_id}", response_model=IndexJobStatus)
+async def index_status(job_id: str, request: Request) -> IndexJobStatus:
+    c = _container(request)
+    job = c.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown index job")
+    return job.to_status()
 
 
 @router.post("/query", response_model=QueryResponse)
 async def query_docs(payload: QueryRequest, request: Request) -> QueryResponse:
     c = _container(request)
-    return await run_in_threadpool(c.rag.answer, payload.query, payload.top_k)
+    async with c.gate.interactive():
+        return await c.rag.answer(payload.query, payload.top_k, payload.mode, payload.filters)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/query/stream")
+async def query_stream(payload: QueryRequest, request: Request) -> StreamingResponse:
+    c = _container(request)
+    stream = c.rag.answer_stream(payload.query, payload.top_k, payload.mode, payload.filters)
+    async with c.gate.interactive():
+        first = await stream.__anext__()
+
+    async def events():
+        async with c.gate.interactive():
+            try:
+                yield _sse(*first)
+                async for event, data in stream:
+                    yield _sse(event, data)
+            except Exception as exc:
+                yield _sse("error", {"detail": str(exc)})
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.post("/summarize")
 async def summarize(payload: SummarizeRequest, request: Request) -> dict:
     c = _container(request)
-    summary = await run_in_threadpool(c.rag.summarize, payload.text)
+    async with c.gate.interactive():
+        summary = await c.rag.summarize(payload.text)
     return {"answer": summary, "sources": [], "confidence": 0.7}
 
 
 @router.post("/classify", response_model=ClassifyResponse)
 async def classify(payload: ClassifyRequest, request: Request) -> ClassifyResponse:
     c = _container(request)
-    label, confidence, scores = await run_in_threadpool(c.classifier.classify, payload.text)
+    async with c.gate.interactive():
+        vector = await c.batcher.embed_one(payload.text) if c.classifier.uses_embeddings else None
+        label, confidence, scores = await run_in_threadpool(c.classifier.classify, payload.text, vector)
     return ClassifyResponse(label=label, confidence=confidence, all_scores=scores)
 
 
+@router.post("/classify/batch", response_model=BatchClassifyResponse)
+async def classify_batch(payload: BatchClassifyRequest, request: Request) -> BatchClassifyResponse:
+    c = _container(request)
+    async with c.gate.interactive():
+        vectors = await c.batcher.embed_many(payload.texts) if c.classifier.uses_embeddings else None
+        results = await run_in_threadpool(c.classifier.classify_batch, payload.texts, vectors)
+    return BatchClassifyResponse(
+        results=[ClassifyResponse(label=label, confidence=conf, all_scores=scores) for label, conf, scores in results]
+    )
+
+
 @router.post("/semantic-search", response_model=SemanticSearchResponse)
 async def semantic_search(payload: QueryRequest, request: Request) -> SemanticSearchResponse:
     c = _container(request)
-    results = await run_in_threadpool(c.rag.semantic_search, payload.query, payload.top_k)
+    async with c.gate.interactive():
+        results = await c.rag.semantic_search(payload.query, payload.top_k, payload.mode, payload.filters)
     return SemanticSearchResponse(results=results)
 
 
+@router.post("/semantic-search/batch", response_model=BatchSemanticSearchResponse)
+async def semantic_search_batch(payload: BatchSemanticSearchRequest, request: Request) -> BatchSemanticSearchResponse:
+    c = _container(request)
+    async with c.gate.interactive():
+        results = await c.rag.semantic_search_batch(payload.queries)
+    return BatchSemanticSearchResponse(results=[SemanticSearchResponse(results=r) for r in results])
+
+
 @router.get("/graph", response_model=GraphResponse)
-async def graph_notes(request: Request) -> GraphResponse:
+async def graph_notes(
+    request: Request,
+    format: Literal["json", "ndjson"] = "json",
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=100_000),
+) -> Response:
+    c = _container(request)
+    try:
+        file_rels, next_cursor = await run_in_threadpool(c.graph.page, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid graph cursor") from None
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if format == "ndjson":
+        return StreamingResponse(
+            compress_stream(c.graph.iter_ndjson(file_rels, next_cursor, dumps), encoding),
+            media_type="application/x-ndjson",
+            headers=stream_headers(encoding),
+        )
+    body = await run_in_threadpool(lambda: dumps(c.graph.payload(file_rels, next_cursor)))
+    return encoded_response(body, "application/json", encoding)
+
+
+async def _graph_note(c: ServiceContainer, note: str) -> str:
+    file_rel = await run_in_threadpool(c.graph.find, note)
+    if file_rel is None:
+        raise HTTPException(status_code=404, detail="Unknown note")
+    return file_rel
+
+
+@router.get("/graph/backlinks", response_model=BacklinksResponse)
+async def graph_backlinks(request: Request, note: str = Query(min_length=1)) -> BacklinksResponse:
+    c = _container(request)
+    file_rel = await _graph_note(c, note)
+    return BacklinksResponse(note=file_rel, backlinks=c.graph.backlinks(file_rel))
+
+
+@router.get("/graph/neighborhood", response_model=GraphResponse)
+async def graph_neighborhood(
+    request: Request,
+    note: str = Query(min_length=1),
+    depth: int = Query(1, ge=1, le=5),
+    direction: Literal["in", "out", "both"] = "both",
+) -> GraphResponse:
     c = _container(request)
-    return await run_in_threadpool(c.graph.build_graph)
+    file_rel = await _graph_note(c, note)
+    return await run_in_threadpool(c.graph.neighborhood, file_rel, depth, direction)
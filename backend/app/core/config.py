@@ -14,11 +14,49 @@ class Settings(BaseSettings):
     port: int = 8000
 
     vault_path: Path = Field(default=Path("/vault"))
+    data_dir: Path = Field(default=Path("/app/data"))
     qdrant_url: str = "http://qdrant:6333"
     qdrant_collection: str = "obsidian_docs"
+    qdrant_prefer_grpc: bool = False
+    qdrant_grpc_port: int = 6334
+    qdrant_max_connections: int = 16
+    qdrant_max_inflight_writes: int = 4
+    qdrant_timeout: int = 30
+    qdrant_startup_retry_sec: float = 1.0
+    qdrant_startup_retry_max_sec: float = 30.0
+    qdrant_hnsw_m: int = 16
+    qdrant_hnsw_ef_construct: int = 100
+    qdrant_search_ef: int = 0
+    qdrant_on_disk: bool = False
+    qdrant_quantization: str = ""
+    qdrant_quantization_always_ram: bool = True
+    qdrant_rescore: bool = True
+    qdrant_oversampling: float = 2.0
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_backend: str = "torch"
+    embedding_quantize: str = ""
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_entries: int = 200_000
+    embedding_cache_dtype: str = "float16"
+    query_cache_max_entries: int = 1024
+    query_cache_ttl_sec: float = 300.0
+    answer_cache_max_entries: int = 256
+    answer_cache_threshold: float = 0.95
+    answer_cache_ttl_sec: float = 3600.0
+    query_embed_max_batch: int = 32
+    query_embed_max_wait_ms: float = 5.0
+    hybrid_candidates: int = 50
+    hybrid_rrf_k: int = 60
     llm_model: str = "distilgpt2"
     llm_max_new_tokens: int = 220
+    llm_context_window: int = 0
+    llm_prefix_cache: bool = True
+    llm_stream_timeout_sec: float = 60.0
+    llm_max_concurrency: int = 1
+    llm_max_queue: int = 16
+    llm_max_batch_size: int = 4
+    llm_batch_wait_ms: float = 10.0
+    llm_queue_timeout_sec: float = 60.0
 
     classifier_model_path: Path = Field(default=Path("/app/models/doc_classifier.keras"))
     classifier_labels: str = "general,task,note,research"
@@ -27,9 +65,15 @@ class Settings(BaseSettings):
     top_k_default: int = 6
     chunk_size: int = 900
     chunk_overlap: int = 120
+    index_embed_batch_size: int = 64
+    index_upsert_batch_size: int = 256
+    index_queue_depth: int = 8
+    index_workers: int = 0
+    index_threads: int = 2
 
     watcher_enabled: bool = True
     auto_reindex_debounce_sec: float = 2.0
+    index_save_delay_sec: float = 5.0
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -37,6 +81,26 @@ class Settings(BaseSettings):
     def cors_origin_list(self) -> list[str]:
         return [o.strip() for o in self.cors_origins.split(",") if o.strip()]
 
+    @property
+    def manifest_path(self) -> Path:
+        return self.data_dir / "index_manifest.json"
+
+    @property
+    def docstore_path(self) -> Path:
+        return self.data_dir / "docstore.sqlite3"
+
+    @property
+    def bm25_path(self) -> Path:
+        return self.data_dir / "bm25.npz"
+
+    @property
+    def onnx_export_dir(self) -> Path:
+        return self.data_dir / "onnx"
+
+    @property
+    def embedding_cache_dir(self) -> Path | None:
+        return self.data_dir / "embedding_cache" if self.embedding_cache_enabled else None
+
     @property
     def label_list(self) -> list[str]:
         return [x.strip() for x in self.classifier_labels.split(",") if x.strip()]
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.api.routes import router
 from app.core.config import get_settings
 from app.core.logging import setup_logging
 from app.core.security import LocalOnlyMiddleware
-from app.services.container import build_container
+from app.services.container import build_container, warmup
+from app.services.generation import GenerationRejected
 
 logger = logging.getLogger(__name__)
 
@@ -20,21 +24,30 @@ async def lifespan(app: FastAPI):
     settings = get_settings()
     setup_logging(settings.log_level)
 
+    started = time.perf_counter()
     container = build_container(settings)
+    container.readiness.started = started
+    container.readiness.record("container", time.perf_counter() - started)
     app.state.container = container
 
     if settings.watcher_enabled:
         container.watcher.start()
 
-    try:
-        logger.info("Running startup indexing")
-        await container.indexer.full_index()
-    except Exception:
-        logger.exception("Initial indexing failed")
+    warmup_task = asyncio.create_task(warmup(container))
 
     yield
 
+    warmup_task.cancel()
     container.watcher.stop()
+    await container.jobs.shutdown()
+    await container.indexer.close()
+    container.index_executor.shutdown(wait=True, cancel_futures=True)
+    container.parse_pool.shutdown()
+    container.embedder.flush_cache()
+    await container.batcher.close()
+    await container.rag.scheduler.close()
+    await container.qdrant.close()
+    container.store.close()
 
 
 settings = get_settings()
@@ -48,3 +61,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.include_router(router)
+
+
+@app.exception_handler(GenerationRejected)
+async def generation_rejected(request: Request, exc: GenerationRejected) -> JSONResponse:
+    return JSONResponse(
+        status_code=exc.status_code, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)}
+    )
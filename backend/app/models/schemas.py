@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
@@ -12,11 +12,22 @@ class SourceItem(BaseModel):
     snippet: str
     line_start: int | None = None
     line_end: int | None = None
+    point_id: str | None = None
+
+
+class SearchFilters(BaseModel):
+    tags: list[str] = []
+    folder: str | None = None
+    frontmatter: dict[str, str | int | float | bool] = {}
+    modified_after: datetime | None = None
+    modified_before: datetime | None = None
 
 
 class QueryRequest(BaseModel):
     query: str = Field(min_length=2)
     top_k: int | None = Field(default=None, ge=1, le=30)
+    mode: Literal["dense", "hybrid"] = "dense"
+    filters: SearchFilters | None = None
 
 
 class QueryResponse(BaseModel):
@@ -24,6 +35,9 @@ class QueryResponse(BaseModel):
     sources: list[SourceItem]
     confidence: float = Field(ge=0, le=1)
     route: str
+    prompt_tokens: int | None = None
+    cached: bool = False
+    timings: dict[str, float] = {}
 
 
 class SummarizeRequest(BaseModel):
@@ -40,26 +54,71 @@ class ClassifyResponse(BaseModel):
     all_scores: dict[str, float]
 
 
+class BatchClassifyRequest(BaseModel):
+    texts: list[str] = Field(min_length=1, max_length=64)
+
+
+class BatchClassifyResponse(BaseModel):
+    results: list[ClassifyResponse]
+
+
 class IndexRequest(BaseModel):
     force_full: bool = True
 
 
+class StageStats(BaseModel):
+    items: int
+    seconds: float
+    items_per_sec: float
+
+
 class IndexStats(BaseModel):
     files_seen: int
     files_indexed: int
     chunks_indexed: int
+    files_skipped: int = 0
+    files_removed: int = 0
+    stages: dict[str, StageStats] = {}
     finished_at: datetime
 
 
 class IndexResponse(BaseModel):
     status: str
-    stats: IndexStats
+    job_id: str | None = None
+    stats: IndexStats | None = None
+
+
+class IndexProgress(BaseModel):
+    files_seen: int
+    files_processed: int
+    files_indexed: int
+    chunks_indexed: int
+
+
+class IndexJobStatus(BaseModel):
+    job_id: str
+    status: str
+    force_full: bool
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    progress: IndexProgress
+    stats: IndexStats | None = None
+    error: str | None = None
 
 
 class SemanticSearchResponse(BaseModel):
     results: list[SourceItem]
 
 
+class BatchSemanticSearchRequest(BaseModel):
+    queries: list[QueryRequest] = Field(min_length=1, max_length=64)
+
+
+class BatchSemanticSearchResponse(BaseModel):
+    results: list[SemanticSearchResponse]
+
+
 class GraphNode(BaseModel):
     id: str
     title: str
@@ -73,6 +132,12 @@ class GraphEdge(BaseModel):
 class GraphResponse(BaseModel):
     nodes: list[GraphNode]
     edges: list[GraphEdge]
+    next_cursor: str | None = None
+
+
+class BacklinksResponse(BaseModel):
+    note: str
+    backlinks: list[GraphNode]
 
 
 class HealthResponse(BaseModel):
@@ -80,3 +145,14 @@ class HealthResponse(BaseModel):
     qdrant_ok: bool
     watcher_running: bool
     metadata: dict[str, Any] = {}
+
+
+class ComponentStatus(BaseModel):
+    status: str
+    seconds: float | None = None
+    error: str | None = None
+
+
+class ReadyResponse(BaseModel):
+    ready: bool
+    components: dict[str, ComponentStatus]
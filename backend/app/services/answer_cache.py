@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.models.schemas import QueryResponse
+
+
+@dataclass
+class _Entry:
+    vector: np.ndarray
+    key: tuple
+    point_ids: list[str]
+    response: QueryResponse
+    created: float
+
+
+def _unit(vector: list[float]) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    return v / (np.linalg.norm(v) or 1.0)
+
+
+class SemanticAnswerCache:
+    def __init__(self, max_entries: int = 256, threshold: float = 0.95, ttl_sec: float | None = None):
+        self.max_entries = max(max_entries, 0)
+        self.threshold = threshold
+        self.ttl_sec = ttl_sec
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._by_key: dict[tuple, set[int]] = {}
+        self._by_point: dict[str, set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def get(self, vector: list[float], key: tuple) -> QueryResponse | None:
+        query = _unit(vector)
+        with self._lock:
+            best, best_score = None, self.threshold
+            for entry_id in list(self._by_key.get(key, ())):
+                entry = self._entries[entry_id]
+                if self.ttl_sec is not None and time.monotonic() - entry.created > self.ttl_sec:
+                    self._drop(entry_id)
+                    continue
+                score = float(query @ entry.vector)
+                if score >= best_score:
+                    best, best_score = entry_id, score
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best)
+            self.hits += 1
+            return self._entries[best].response
+
+    def put(self, vector: list[float], key: tuple, point_ids: list[str], response: QueryResponse) -> None:
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(_unit(vector), key, point_ids, response, time.monotonic())
+            self._by_key.setdefault(key, set()).add(entry_id)
+            for pid in point_ids:
+                self._by_point.setdefault(pid, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, point_ids: list[str]) -> int:
+        with self._lock:
+            entry_ids = set()
+            for pid in point_ids:
+                entry_ids |= self._by_point.get(pid, set())
+            for entry_id in entry_ids:
+                self._drop(entry_id)
+            self.invalidated += len(entry_ids)
+            return len(entry_ids)
+
+    def _drop(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        siblings = self._by_key.get(entry.key)
+        if siblings is not None:
+            siblings.discard(entry_id)
+            if not siblings:
+                del self._by_key[entry.key]
+        for pid in entry.point_ids:
+            cited = self._by_point.get(pid)
+            if cited is not None:
+                cited.discard(entry_id)
+                if not cited:
+                    del self._by_point[pid]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_key.clear()
+            self._by_point.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
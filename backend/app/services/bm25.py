@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"#?[\w][\w\-./]*")
+FORMAT_VERSION = 2
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for raw in TOKEN_RE.findall(text.lower()):
+        token = raw.rstrip(".-/")
+        if token and token != "#":
+            tokens.append(token)
+    return tokens
+
+
+def _pack_strings(values: list[str]) -> np.ndarray:
+    return np.frombuffer("\0".join(values).encode("utf-8"), dtype=np.uint8)
+
+
+def _unpack_strings(data: np.ndarray, count: int) -> list[str]:
+    return data.tobytes().decode("utf-8").split("\0") if count else []
+
+
+class BM25Index:
+    def __init__(self, path: Path | None = None, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._reset()
+        if path is not None and path.exists():
+            try:
+                self._load(path)
+            except Exception:
+                logger.warning("BM25 index at %s is unreadable; starting fresh", path)
+                self._reset()
+
+    def _reset(self) -> None:
+        self.postings: dict[str, tuple[array, array]] = {}
+        self.doc_ids: list[str] = []
+        self.doc_files: list[str] = []
+        self.doc_len = array("I")
+        self.alive = bytearray()
+        self.by_point: dict[str, int] = {}
+        self.by_file: dict[str, set[int]] = {}
+        self.total_len = 0
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self.by_point)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+            self._dirty = True
+
+    def add(self, file_path: str, chunks: list[tuple[str, str]]) -> None:
+        with self._lock:
+            for point_id, text in chunks:
+                if point_id in self.by_point:
+                    self._kill(self.by_point[point_id])
+                tokens = tokenize(text)
+                doc = len(self.doc_ids)
+                self.doc_ids.append(point_id)
+                self.doc_files.append(file_path)
+                self.doc_len.append(len(tokens))
+                self.alive.append(1)
+                self.by_point[point_id] = doc
+                self.by_file.setdefault(file_path, set()).add(doc)
+                self.total_len += len(tokens)
+                for term, tf in Counter(tokens).items():
+                    docs, tfs = self.postings.setdefault(term, (array("I"), array("H")))
+                    docs.append(doc)
+                    tfs.append(min(tf, 65535))
+            self._dirty = True
+
+    def remove_points(self, point_ids: list[str]) -> None:
+        with self._lock:
+            for point_id in point_ids:
+                doc = self.by_point.get(point_id)
+                if doc is not None:
+                    self._kill(doc)
+            self._maybe_compact()
+
+    def remove_file(self, file_path: str) -> None:
+        with self._lock:
+            for doc in list(self.by_file.get(file_path, ())):
+                self._kill(doc)
+            self._maybe_compact()
+
+    def _kill(self, doc: int) -> None:
+        if not self.alive[doc]:
+            return
+        self.alive[doc] = 0
+        self.total_len -= self.doc_len[doc]
+        self.by_point.pop(self.doc_ids[doc], None)
+        docs = self.by_file.get(self.doc_files[doc])
+        if docs is not None:
+            docs.discard(doc)
+            if not docs:
+                del self.by_file[self.doc_files[doc]]
+        self._dirty = True
+
+    def _maybe_compact(self) -> None:
+        dead = len(self.doc_ids) - len(self.by_point)
+        if dead > 1024 and dead > len(self.doc_ids) // 3:
+            self._compact()
+
+    def _compact(self) -> None:
+        keep = np.frombuffer(bytes(self.alive), dtype=np.uint8).astype(bool)
+        remap = np.full(len(keep), -1, dtype=np.int64)
+        remap[keep] = np.arange(int(keep.sum()))
+        postings: dict[str, tuple[array, array]] = {}
+        for term, (docs, tfs) in self.postings.items():
+            d = np.frombuffer(docs, dtype=np.uint32)
+            mask = keep[d]
+            if mask.any():
+                postings[term] = (
+                    array("I", remap[d[mask]].astype(np.uint32).tobytes()),
+                    array("H", np.frombuffer(tfs, dtype=np.uint16)[mask].tobytes()),
+                )
+        idx = np.flatnonzero(keep)
+        self.postings = postings
+        self.doc_ids = [self.doc_ids[i] for i in idx]
+        self.doc_files = [self.doc_files[i] for i in idx]
+        self.doc_len = array("I", np.frombuffer(self.doc_len, dtype=np.uint32)[keep].tobytes())
+        self.alive = bytearray(b"\x01" * len(self.doc_ids))
+        self._rebuild_lookups()
+        self._dirty = True
+
+    def _rebuild_lookups(self) -> None:
+        self.by_point = {}
+        self.by_file = {}
+        for doc, (point_id, file_path) in enumerate(zip(self.doc_ids, self.doc_files)):
+            if self.alive[doc]:
+                self.by_point[point_id] = doc
+                self.by_file.setdefault(file_path, set()).add(doc)
+
+    def search(self, query: str, limit: int) -> list[tuple[str, float]]:
+        terms = set(tokenize(query))
+        with self._lock:
+            n_alive = len(self.by_point)
+            if not terms or n_alive == 0:
+                return []
+            avgdl = max(self.total_len / n_alive, 1.0)
+            lengths = np.frombuffer(self.doc_len, dtype=np.uint32).astype(np.float32)
+            scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+            for term in terms:
+                posting = self.postings.get(term)
+                if posting is None:
+                    continue
+                docs = np.frombuffer(posting[0], dtype=np.uint32)
+                tfs = np.frombuffer(posting[1], dtype=np.uint16).astype(np.float32)
+                df = len(docs)
+                idf = math.log(1 + (n_alive - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * lengths[docs] / avgdl)
+                scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+            scores *= np.frombuffer(bytes(self.alive), dtype=np.uint8)
+            hits = np.flatnonzero(scores > 0)
+            if len(hits) > limit:
+                hits = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+            hits = hits[np.argsort(-scores[hits])]
+            return [(self.doc_ids[i], float(scores[i])) for i in hits]
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                if len(self.by_point) != len(self.doc_ids):
+                    self._compact()
+                terms = sorted(self.postings)
+                offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+                np.cumsum([len(self.postings[t][0]) for t in terms], out=offsets[1:])
+                arrays = dict(
+                    version=np.array([FORMAT_VERSION]),
+                    counts=np.array([len(terms), len(self.doc_ids)], dtype=np.int64),
+                    terms=_pack_strings(terms),
+                    offsets=offsets,
+                    docs=np.frombuffer(b"".join(self.postings[t][0].tobytes() for t in terms), dtype=np.uint32),
+                    tfs=np.frombuffer(b"".join(self.postings[t][1].tobytes() for t in terms), dtype=np.uint16),
+                    doc_ids=_pack_strings(self.doc_ids),
+                    doc_files=_pack_strings(self.doc_files),
+                    doc_len=np.frombuffer(self.doc_len.tobytes(), dtype=np.uint32),
+                )
+                self._dirty = False
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(".tmp.npz")
+                np.savez(tmp, **arrays)
+                os.replace(tmp, self.path)
+            except BaseException:
+                self._dirty = True
+                raise
+
+    def _load(self, path: Path) -> None:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"][0]) != FORMAT_VERSION:
+                raise ValueError("unsupported BM25 index version")
+            n_terms, n_docs = (int(x) for x in data["counts"])
+            terms = _unpack_strings(data["terms"], n_terms)
+            offsets = data["offsets"]
+            docs = data["docs"]
+            tfs = data["tfs"]
+            self.postings = {
+                term: (
+                    array("I", docs[offsets[i] : offsets[i + 1]].tobytes()),
+                    array("H", tfs[offsets[i] : offsets[i + 1]].tobytes()),
+                )
+                for i, term in enumerate(terms)
+            }
+            self.doc_ids = _unpack_strings(data["doc_ids"], n_docs)
+            self.doc_files = _unpack_strings(data["doc_files"], n_docs)
+            self.doc_len = array("I", data["doc_len"].tobytes())
+        self.alive = bytearray(b"\x01" * len(self.doc_ids))
+        self.total_len = int(sum(self.doc_len))
+        self._rebuild_lookups()
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[tuple[str, float]]:
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
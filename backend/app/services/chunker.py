@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass
 
 from app.services.parser import ParsedDocument
 
 
+def content_digest(heading: str | None, text: str) -> str:
+    return hashlib.sha1(f"{heading or ''}\0{text}".encode("utf-8")).hexdigest()[:20]
+
+
 @dataclass
 class Chunk:
     chunk_id: str
@@ -22,23 +27,27 @@ class SectionAwareChunker:
     def chunk_document(self, doc: ParsedDocument) -> list[Chunk]:
         sections = self._split_by_headings(doc.body)
         chunks: list[Chunk] = []
-        idx = 0
+        seen: dict[str, int] = {}
         running_line = 1
 
         for heading, text in sections:
             section_chunks = self._sliding_chunks(text)
             for part in section_chunks:
                 line_count = part.count("\n") + 1
+                digest = content_digest(heading, part)
+                occurrence = seen.get(digest, 0)
+                seen[digest] = occurrence + 1
+                if occurrence:
+                    digest = f"{digest}~{occurrence}"
                 chunks.append(
                     Chunk(
-                        chunk_id=f"{doc.path.as_posix()}::{idx}",
+                        chunk_id=f"{doc.path.as_posix()}::{digest}",
                         text=part,
                         heading=heading,
                         line_start=running_line,
                         line_end=running_line + line_count - 1,
                     )
                 )
-                idx += 1
                 running_line += max(line_count - 1, 1)
 
         return chunks
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 import logging
+import threading
 from pathlib import Path
 
 import numpy as np
-import tensorflow as tf
 
+from app.services.classifier_runtime import NumpyClassifier
 from app.services.embeddings import EmbeddingService
 
 logger = logging.getLogger(__name__)
@@ -13,22 +14,68 @@ logger = logging.getLogger(__name__)
 
 class QueryRouterClassifier:
     def __init__(self, model_path: Path, labels: list[str], embedding_service: EmbeddingService):
+        self.model_path = model_path
         self.labels = labels
         self.embedding_service = embedding_service
         self.model = None
+        self.runtime: str | None = None
+        self._loaded = False
+        self._lock = threading.Lock()
 
-        if model_path.exists():
-            logger.info("Loading TensorFlow classifier from %s", model_path)
-            self.model = tf.keras.models.load_model(model_path)
-        else:
-            logger.warning("Classifier model not found at %s; using heuristic fallback", model_path)
+    def load(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            weights_path = self.model_path.with_suffix(".npz")
+            if weights_path.exists():
+                logger.info("Loading NumPy classifier from %s", weights_path)
+                self.model = NumpyClassifier.load(weights_path)
+                self.runtime = "numpy"
+            elif self.model_path.exists():
+                try:
+                    import tensorflow as tf
+                except ImportError:
+                    logger.warning(
+                        "TensorFlow is not installed and %s is missing; export it with "
+                        "scripts/export_classifier.py. Using heuristic fallback",
+                        weights_path,
+                    )
+                else:
+                    logger.info("Loading TensorFlow classifier from %s", self.model_path)
+                    self.model = tf.keras.models.load_model(self.model_path)
+                    self.runtime = "tensorflow"
+            else:
+                logger.warning("Classifier model not found at %s; using heuristic fallback", self.model_path)
+            self._loaded = True
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded
+
+    @property
+    def uses_embeddings(self) -> bool:
+        return self.model is not None
 
-    def classify(self, text: str) -> tuple[str, float, dict[str, float]]:
+    def classify(self, text: str, vector: list[float] | None = None) -> tuple[str, float, dict[str, float]]:
+        return self.classify_batch([text], None if vector is None else [vector])[0]
+
+    def classify_batch(
+        self, texts: list[str], vectors: list[list[float]] | None = None
+    ) -> list[tuple[str, float, dict[str, float]]]:
+        self.load()
         if self.model is None:
-            return self._heuristic(text)
+            return [self._heuristic(text) for text in texts]
+
+        if vectors is None:
+            vectors = self.embedding_service.embed(texts, cache=False)
+        batch = np.asarray(vectors, dtype=np.float32)
+        if self.runtime == "numpy":
+            probs = self.model.predict(batch)
+        else:
+            probs = self.model.predict(batch, verbose=0)
+        return [self._result(row) for row in probs]
 
-        vec = np.array([self.embedding_service.embed_one(text)], dtype=np.float32)
-        probs = self.model.predict(vec, verbose=0)[0]
+    def _result(self, probs: np.ndarray) -> tuple[str, float, dict[str, float]]:
         idx = int(np.argmax(probs))
         scores = {self.labels[i]: float(probs[i]) for i in range(min(len(self.labels), len(probs)))}
         label = self.labels[idx] if idx < len(self.labels) else "general"
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - x.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+    "tanh": np.tanh,
+    "softmax": _softmax,
+}
+
+
+class NumpyClassifier:
+    def __init__(self, layers: list[tuple[np.ndarray, np.ndarray, str]]):
+        for _, _, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {activation}")
+        self.layers = layers
+
+    @property
+    def input_dim(self) -> int:
+        return self.layers[0][0].shape[0]
+
+    @classmethod
+    def load(cls, path: Path) -> NumpyClassifier:
+        with np.load(path, allow_pickle=False) as data:
+            activations = [str(a) for a in data["activations"]]
+            return cls(
+                [
+                    (data[f"w{i}"].astype(np.float32), data[f"b{i}"].astype(np.float32), activation)
+                    for i, activation in enumerate(activations)
+                ]
+            )
+
+    def save(self, path: Path) -> None:
+        arrays = {"activations": np.array([a for _, _, a in self.layers])}
+        for i, (w, b, _) in enumerate(self.layers):
+            arrays[f"w{i}"] = w
+            arrays[f"b{i}"] = b
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.stem + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        out = np.asarray(x, dtype=np.float32)
+        for w, b, activation in self.layers:
+            out = ACTIVATIONS[activation](out @ w + b)
+        return out
+
+
+def from_keras(model: Any) -> NumpyClassifier:
+    layers = []
+    for layer in model.layers:
+        weights = layer.get_weights()
+        if not weights:
+            continue
+        if len(weights) != 2:
+            raise ValueError(f"Unsupported layer {layer.name}: expected a Dense kernel and bias")
+        kernel, bias = weights
+        layers.append(
+            (kernel.astype(np.float32), bias.astype(np.float32), layer.get_config().get("activation", "linear"))
+        )
+    if not layers:
+        raise ValueError("Model has no weighted layers")
+    return NumpyClassifier(layers)
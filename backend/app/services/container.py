@@ -1,44 +1,197 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
 from app.core.config import Settings
-from app.services.chunker import SectionAwareChunker
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.bm25 import BM25Index
 from app.services.classifier import QueryRouterClassifier
+from app.services.docstore import DocumentStore
+from app.services.embed_batcher import EmbeddingBatcher
 from app.services.embeddings import EmbeddingService
+from app.services.generation import GenerationScheduler
 from app.services.graph import VaultGraphService
 from app.services.indexer import VaultIndexer
+from app.services.jobs import IndexJobRunner
+from app.services.link_graph import LinkGraph
 from app.services.llm_service import LocalLLMService
-from app.services.parser import MarkdownParser
+from app.services.manifest import IndexManifest
+from app.services.priority import InteractiveGate
 from app.services.qdrant_service import QdrantService
+from app.services.query_cache import IndexGeneration, TTLCache
 from app.services.rag import RAGService
+from app.services.readiness import Readiness
 from app.services.watcher import VaultWatcher
+from app.services.workers import ParsePool
 
 
 @dataclass
 class ServiceContainer:
-    parser: MarkdownParser
-    chunker: SectionAwareChunker
     embedder: EmbeddingService
+    batcher: EmbeddingBatcher
     qdrant: QdrantService
+    store: DocumentStore
     llm: LocalLLMService
     classifier: QueryRouterClassifier
     rag: RAGService
     indexer: VaultIndexer
     watcher: VaultWatcher
     graph: VaultGraphService
+    parse_pool: ParsePool
+    index_executor: ThreadPoolExecutor
+    gate: InteractiveGate
+    jobs: IndexJobRunner
+    readiness: Readiness
 
 
+logger = logging.getLogger(__name__)
+
 
 def build_container(settings: Settings) -> ServiceContainer:
-    parser = MarkdownParser()
-    chunker = SectionAwareChunker(chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap)
-    embedder = EmbeddingService(settings.embedding_model)
-    qdrant = QdrantService(settings.qdrant_url, settings.qdrant_collection, embedder.dimension)
-    llm = LocalLLMService(settings.llm_model, settings.llm_max_new_tokens)
+    parse_pool = ParsePool(settings.chunk_size, settings.chunk_overlap, workers=settings.index_workers)
+    embedder = EmbeddingService(
+        settings.embedding_model,
+        backend=settings.embedding_backend,
+        quantize=settings.embedding_quantize,
+        export_dir=settings.onnx_export_dir,
+        cache_dir=settings.embedding_cache_dir,
+        cache_max_entries=settings.embedding_cache_max_entries,
+        cache_dtype=settings.embedding_cache_dtype,
+    )
+    qdrant = QdrantService(
+        settings.qdrant_url,
+        settings.qdrant_collection,
+        prefer_grpc=settings.qdrant_prefer_grpc,
+        grpc_port=settings.qdrant_grpc_port,
+        max_connections=settings.qdrant_max_connections,
+        max_inflight_writes=settings.qdrant_max_inflight_writes,
+        timeout=settings.qdrant_timeout,
+        hnsw_m=settings.qdrant_hnsw_m,
+        hnsw_ef_construct=settings.qdrant_hnsw_ef_construct,
+        search_ef=settings.qdrant_search_ef,
+        on_disk=settings.qdrant_on_disk,
+        quantization=settings.qdrant_quantization,
+        quantization_always_ram=settings.qdrant_quantization_always_ram,
+        rescore=settings.qdrant_rescore,
+        oversampling=settings.qdrant_oversampling,
+    )
+    llm = LocalLLMService(
+        settings.llm_model,
+        settings.llm_max_new_tokens,
+        settings.llm_context_window,
+        prefix_cache=settings.llm_prefix_cache,
+        stream_timeout=settings.llm_stream_timeout_sec,
+    )
+    scheduler = GenerationScheduler(
+        llm,
+        max_concurrency=settings.llm_max_concurrency,
+        max_queue=settings.llm_max_queue,
+        max_batch_size=settings.llm_max_batch_size,
+        max_wait_ms=settings.llm_batch_wait_ms,
+        queue_timeout_sec=settings.llm_queue_timeout_sec,
+    )
     classifier = QueryRouterClassifier(settings.classifier_model_path, settings.label_list, embedder)
-    rag = RAGService(embedder, qdrant, llm, classifier, settings.top_k_default)
-    indexer = VaultIndexer(settings.vault_path, parser, chunker, embedder, qdrant)
+    batcher = EmbeddingBatcher(
+        embedder, max_batch_size=settings.query_embed_max_batch, max_wait_ms=settings.query_embed_max_wait_ms
+    )
+    generation = IndexGeneration()
+    bm25 = BM25Index(settings.bm25_path)
+    store = DocumentStore(settings.docstore_path)
+    links = LinkGraph()
+    answer_cache = SemanticAnswerCache(
+        settings.answer_cache_max_entries, settings.answer_cache_threshold, settings.answer_cache_ttl_sec
+    )
+    rag = RAGService(
+        embedder,
+        qdrant,
+        llm,
+        classifier,
+        store,
+        bm25,
+        generation,
+        answer_cache,
+        settings.top_k_default,
+        batcher,
+        results_cache=TTLCache(settings.query_cache_max_entries, settings.query_cache_ttl_sec),
+        vector_cache=TTLCache(settings.query_cache_max_entries),
+        hybrid_candidates=settings.hybrid_candidates,
+        rrf_k=settings.hybrid_rrf_k,
+        scheduler=scheduler,
+    )
+    index_executor = ThreadPoolExecutor(max_workers=max(settings.index_threads, 1), thread_name_prefix="index")
+    gate = InteractiveGate()
+    manifest = IndexManifest(settings.manifest_path, settings.qdrant_collection, embedder.model_key)
+    indexer = VaultIndexer(
+        settings.vault_path,
+        parse_pool,
+        embedder,
+        qdrant,
+        manifest,
+        store,
+        bm25,
+        links,
+        generation,
+        answer_cache,
+        embed_batch_size=settings.index_embed_batch_size,
+        upsert_batch_size=settings.index_upsert_batch_size,
+        queue_depth=settings.index_queue_depth,
+        executor=index_executor,
+        gate=gate,
+        save_delay=settings.index_save_delay_sec,
+    )
+    jobs = IndexJobRunner(indexer)
     watcher = VaultWatcher(settings.vault_path, indexer, settings.auto_reindex_debounce_sec)
-    graph = VaultGraphService(settings.vault_path, parser)
-    return ServiceContainer(parser, chunker, embedder, qdrant, llm, classifier, rag, indexer, watcher, graph)
+    graph = VaultGraphService(settings.vault_path, parse_pool, links)
+    graph.load(store.link_rows())
+    return ServiceContainer(
+        embedder,
+        batcher,
+        qdrant,
+        store,
+        llm,
+        classifier,
+        rag,
+        indexer,
+        watcher,
+        graph,
+        parse_pool,
+        index_executor,
+        gate,
+        jobs,
+        Readiness(
+            ["container", "embedder", "qdrant", "classifier", "llm"],
+            retry_delay=settings.qdrant_startup_retry_sec,
+            max_retry_delay=settings.qdrant_startup_retry_max_sec,
+        ),
+    )
+
+
+async def _start_indexing(container: ServiceContainer) -> None:
+    if await container.readiness.run(
+        "qdrant", container.qdrant.ensure_collection, container.embedder.dimension, retry=True
+    ):
+        job = container.jobs.submit(force_full=False)
+        logger.info("Startup indexing queued as job %s", job.job_id)
+
+
+async def warmup(container: ServiceContainer) -> None:
+    r = container.readiness
+    indexing = None
+    if await r.run("embedder", container.embedder.load):
+        indexing = asyncio.create_task(_start_indexing(container))
+    try:
+        await r.run("classifier", container.classifier.load)
+        if await r.run("llm", container.llm.load):
+            try:
+                await asyncio.to_thread(container.llm.warm_prefixes, container.rag.prompt_prefixes())
+            except Exception:
+                logger.warning("Prompt prefix cache warmup failed", exc_info=True)
+        if indexing is not None:
+            await indexing
+    finally:
+        if indexing is not None:
+            indexing.cancel()
+    r.log_summary()
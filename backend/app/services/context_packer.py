@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from app.models.schemas import SourceItem
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+
+
+@dataclass
+class PackedContext:
+    text: str
+    sources: list[SourceItem]
+    tokens: int
+    dropped: int
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s for s in SENTENCE_RE.split(text.strip()) if s.strip()]
+
+
+class ContextPacker:
+    def __init__(self, count_tokens: Callable[[str], int], min_block_tokens: int = 24):
+        self.count_tokens = count_tokens
+        self.min_block_tokens = min_block_tokens
+
+    @staticmethod
+    def _header(index: int, source: SourceItem) -> str:
+        return f"[source:{index}] file={source.file_path} heading={source.heading or '-'}\n"
+
+    @staticmethod
+    def _overlaps(source: SourceItem, packed: list[SourceItem]) -> bool:
+        if source.line_start is None or source.line_end is None:
+            return False
+        return any(
+            p.file_path == source.file_path
+            and p.line_start is not None
+            and p.line_end is not None
+            and source.line_start < p.line_end
+            and p.line_start < source.line_end
+            for p in packed
+        )
+
+    def _trim(self, header: str, text: str, budget: int) -> tuple[str, int] | None:
+        kept: list[str] = []
+        tokens = 0
+        for sentence in split_sentences(text):
+            candidate = header + " ".join(kept + [sentence])
+            candidate_tokens = self.count_tokens(candidate + "\n\n")
+            if candidate_tokens > budget:
+                break
+            kept.append(sentence)
+            tokens = candidate_tokens
+        if not kept:
+            return None
+        return header + " ".join(kept), tokens
+
+    def pack(self, sources: list[SourceItem], texts: dict[str, str], budget: int) -> PackedContext:
+        blocks: list[str] = []
+        packed: list[SourceItem] = []
+        seen_texts: set[str] = set()
+        used = 0
+        dropped = 0
+        for source in sorted(sources, key=lambda s: s.score, reverse=True):
+            text = texts.get(source.point_id) or source.snippet
+            normalized = " ".join(text.split())
+            if any(normalized in seen for seen in seen_texts) or self._overlaps(source, packed):
+                dropped += 1
+                continue
+            remaining = budget - used
+            if remaining < self.min_block_tokens:
+                dropped += 1
+                continue
+            header = self._header(len(packed) + 1, source)
+            block = header + text
+            tokens = self.count_tokens(block + "\n\n")
+            if tokens > remaining:
+                trimmed = self._trim(header, text, remaining)
+                if trimmed is None:
+                    dropped += 1
+                    continue
+                block, tokens = trimmed
+            seen_texts.add(normalized)
+            blocks.append(block)
+            packed.append(source)
+            used += tokens
+        return PackedContext(text="\n\n".join(blocks), sources=packed, tokens=used, dropped=dropped)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+from app.models.schemas import SourceItem
+from app.services.chunker import Chunk
+from app.services.link_graph import note_aliases
+from app.services.qdrant_service import point_id
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    file_path TEXT PRIMARY KEY,
+    title TEXT,
+    tags TEXT NOT NULL DEFAULT '[]',
+    frontmatter TEXT NOT NULL DEFAULT '{}',
+    links TEXT NOT NULL DEFAULT '[]',
+    modified_at REAL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    point_id TEXT PRIMARY KEY,
+    file_path TEXT NOT NULL,
+    heading TEXT,
+    text TEXT NOT NULL,
+    line_start INTEGER,
+    line_end INTEGER
+);
+CREATE INDEX IF NOT EXISTS chunks_file_path ON chunks(file_path);
+"""
+
+
+class DocumentStore:
+    def __init__(self, path: Path | str = ":memory:"):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def write_file(
+        self,
+        file_path: str,
+        document: dict,
+        added: list[Chunk],
+        removed: list[str],
+        moved: list[tuple[str, int, int]],
+        replace: bool = False,
+    ) -> None:
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute("DELETE FROM chunks WHERE file_path = ?", (file_path,))
+            else:
+                self._conn.executemany("DELETE FROM chunks WHERE point_id = ?", [(pid,) for pid in removed])
+                self._conn.executemany(
+                    "UPDATE chunks SET line_start = ?, line_end = ? WHERE point_id = ?",
+                    [(start, end, pid) for pid, start, end in moved],
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (point_id(c.chunk_id), file_path, c.heading, c.text, c.line_start, c.line_end)
+                    for c in added
+                ],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    file_path,
+                    document.get("title"),
+                    json.dumps(document.get("tags", [])),
+                    json.dumps(document.get("frontmatter", {}), default=str),
+                    json.dumps(document.get("links", [])),
+                    document.get("modified_at"),
+                ),
+            )
+
+    def delete_file(self, file_path: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks WHERE file_path = ?", (file_path,))
+            self._conn.execute("DELETE FROM documents WHERE file_path = ?", (file_path,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM documents")
+
+    def link_rows(self) -> list[tuple[str, str, list[str], list[str]]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT file_path, title, links, frontmatter FROM documents").fetchall()
+        return [
+            (file_path, str(title or ""), json.loads(links), note_aliases(json.loads(frontmatter)))
+            for file_path, title, links, frontmatter in rows
+        ]
+
+    def chunk_texts(self, point_ids: list[str]) -> dict[str, str]:
+        if not point_ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT point_id, text FROM chunks WHERE point_id IN ({','.join('?' * len(point_ids))})",
+                point_ids,
+            ).fetchall()
+        return dict(rows)
+
+    def sources(self, hits: list[tuple[str, float]], snippet_chars: int = 300) -> list[SourceItem]:
+        return self.sources_many([hits], snippet_chars)[0]
+
+    def sources_many(
+        self, hit_lists: list[list[tuple[str, float]]], snippet_chars: int = 300
+    ) -> list[list[SourceItem]]:
+        ids = list({pid for hits in hit_lists for pid, _ in hits})
+        by_id = {}
+        if ids:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT c.point_id, c.file_path, d.title, c.heading, substr(c.text, 1, ?), c.line_start, "
+                    "c.line_end FROM chunks c LEFT JOIN documents d ON d.file_path = c.file_path "
+                    f"WHERE c.point_id IN ({','.join('?' * len(ids))})",
+                    (snippet_chars, *ids),
+                ).fetchall()
+            by_id = {row[0]: row for row in rows}
+        return [
+            [
+                SourceItem(
+                    file_path=row[1],
+                    score=score,
+                    title=row[2],
+                    heading=row[3],
+                    snippet=row[4],
+                    line_start=row[5],
+                    line_end=row[6],
+                    point_id=pid,
+                )
+                for pid, score in hits
+                if (row := by_id.get(pid)) is not None
+            ]
+            for hits in hit_lists
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app.services.embeddings import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    def __init__(self, embedder: EmbeddingService, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.embedder = embedder
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max(max_wait_ms, 0.0) / 1000
+        self.batches = 0
+        self.requests = 0
+        self._queue: asyncio.Queue[tuple[str, asyncio.Future]] | None = None
+        self._worker: asyncio.Task | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed-batch")
+
+    async def embed_one(self, text: str) -> list[float]:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        if len(texts) == 1:
+            return [await self.embed_one(texts[0])]
+        self.batches += 1
+        self.requests += len(texts)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(self.embedder.embed, texts, cache=False))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except TimeoutError:
+                    break
+
+            batch = [(text, fut) for text, fut in batch if not fut.cancelled()]
+            if not batch:
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            try:
+                vectors = await loop.run_in_executor(
+                    self._executor, partial(self.embedder.embed, [t for t, _ in batch], cache=False)
+                )
+            except Exception as exc:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                continue
+            for (_, fut), vec in zip(batch, vectors):
+                if not fut.done():
+                    fut.set_result(vec)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+KEY_BYTES = 16
+
+
+class EmbeddingCache:
+    def __init__(self, directory: Path, model_key: str, dimension: int, max_entries: int, dtype: str = "float16"):
+        self.model_key = model_key
+        self.dimension = dimension
+        self.max_entries = max(max_entries, 1)
+        self.dtype = np.dtype(dtype)
+        self.directory = directory / re.sub(r"[^A-Za-z0-9_.-]+", "_", model_key)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta_path = self.directory / "meta.json"
+        meta = {
+            "model": self.model_key,
+            "dimension": self.dimension,
+            "dtype": self.dtype.name,
+            "max_entries": self.max_entries,
+        }
+        mode = "r+"
+        try:
+            if json.loads(meta_path.read_text(encoding="utf-8")) != meta:
+                raise ValueError("layout changed")
+        except (OSError, ValueError):
+            logger.info("Creating embedding cache at %s", self.directory)
+            mode = "w+"
+
+        self.keys = np.lib.format.open_memmap(
+            self.directory / "keys.npy", mode=mode, dtype=np.uint8, shape=(self.max_entries, KEY_BYTES)
+        )
+        self.ticks = np.lib.format.open_memmap(
+            self.directory / "ticks.npy", mode=mode, dtype=np.uint64, shape=(self.max_entries,)
+        )
+        self.vectors = np.lib.format.open_memmap(
+            self.directory / "vectors.npy", mode=mode, dtype=self.dtype, shape=(self.max_entries, self.dimension)
+        )
+        if mode == "w+":
+            meta_path.write_text(json.dumps(meta), encoding="utf-8")
+
+        self._slots = {self.keys[i].tobytes(): int(i) for i in np.flatnonzero(self.ticks)}
+        self._free = np.flatnonzero(self.ticks == 0)[::-1].tolist()
+        self._tick = int(self.ticks.max()) if len(self._slots) else 0
+
+    def _key(self, text: str) -> bytes:
+        h = hashlib.blake2b(digest_size=KEY_BYTES)
+        h.update(self.model_key.encode("utf-8"))
+        h.update(b"\0")
+        h.update(text.encode("utf-8"))
+        return h.digest()
+
+    def lookup(self, texts: list[str]) -> tuple[np.ndarray, list[int]]:
+        out = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        missing: list[int] = []
+        with self._lock:
+            for i, text in enumerate(texts):
+                slot = self._slots.get(self._key(text))
+                if slot is None:
+                    missing.append(i)
+                    continue
+                out[i] = self.vectors[slot]
+                self._tick += 1
+                self.ticks[slot] = self._tick
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return out, missing
+
+    def store(self, texts: list[str], vectors: np.ndarray) -> None:
+        with self._lock:
+            pending = [(self._key(t), v) for t, v in zip(texts, vectors)]
+            pending = [(k, v) for k, v in dict(pending).items() if k not in self._slots]
+            if len(pending) > self.max_entries:
+                pending = pending[-self.max_entries :]
+            self._evict(len(pending) - len(self._free))
+            for key, vec in pending:
+                slot = self._free.pop()
+                self._tick += 1
+                self._slots[key] = slot
+                self.keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                self.ticks[slot] = self._tick
+                self.vectors[slot] = vec
+
+    def _evict(self, count: int) -> None:
+        if count <= 0:
+            return
+        ticks = np.where(self.ticks == 0, np.iinfo(np.uint64).max, self.ticks)
+        victims = np.argpartition(ticks, count - 1)[:count]
+        for slot in victims.tolist():
+            self._slots.pop(self.keys[slot].tobytes(), None)
+            self.ticks[slot] = 0
+            self._free.append(slot)
+
+    def flush(self) -> None:
+        with self._lock:
+            for arr in (self.keys, self.ticks, self.vectors):
+                arr.flush()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._slots),
+            "max_entries": self.max_entries,
+            "size_bytes": int(self.vectors.nbytes + self.keys.nbytes + self.ticks.nbytes),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -1,23 +1,123 @@
 from __future__ import annotations
 
 import logging
+import re
+import threading
+from pathlib import Path
 
-from sentence_transformers import SentenceTransformer
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache
 
 logger = logging.getLogger(__name__)
 
+BACKENDS = ("torch", "onnx")
+
+
+def backend_key(model_name: str, backend: str = "torch", quantize: str = "") -> str:
+    if backend == "torch":
+        return model_name
+    return f"{model_name}@{backend}" + (f"-qint8-{quantize}" if quantize else "")
+
+
+def load_sentence_transformer(model_name: str, backend: str = "torch", quantize: str = "", export_dir: Path | None = None):
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {BACKENDS}")
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+
+    local = (export_dir or Path("onnx_models")) / re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+    if not (local / "onnx" / "model.onnx").exists():
+        logger.info("Exporting %s to ONNX at %s", model_name, local)
+        SentenceTransformer(model_name, backend="onnx").save(str(local))
+    if not quantize:
+        return SentenceTransformer(str(local), backend="onnx")
+
+    file_name = f"onnx/model_qint8_{quantize}.onnx"
+    if not (local / file_name).exists():
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        logger.info("Quantizing %s to int8 (%s)", model_name, quantize)
+        export_dynamic_quantized_onnx_model(SentenceTransformer(str(local), backend="onnx"), quantize, str(local))
+    return SentenceTransformer(str(local), backend="onnx", model_kwargs={"file_name": file_name})
+
+
+def cosine_parity(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    ref = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    cand = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return np.sum(ref * cand, axis=1)
+
 
 class EmbeddingService:
-    def __init__(self, model_name: str):
-        logger.info("Loading embedding model: %s", model_name)
-        self.model = SentenceTransformer(model_name)
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "torch",
+        quantize: str = "",
+        export_dir: Path | None = None,
+        cache_dir: Path | None = None,
+        cache_max_entries: int = 200_000,
+        cache_dtype: str = "float16",
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.quantize = quantize
+        self.export_dir = export_dir
+        self.model_key = backend_key(model_name, backend, quantize)
+        self.cache_dir = cache_dir
+        self.cache_max_entries = cache_max_entries
+        self.cache_dtype = cache_dtype
+        self.cache: EmbeddingCache | None = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        with self._lock:
+            if self._model is not None:
+                return
+            logger.info("Loading embedding model: %s", self.model_key)
+            model = load_sentence_transformer(self.model_name, self.backend, self.quantize, self.export_dir)
+            if self.cache_dir is not None:
+                dim = model.get_sentence_embedding_dimension()
+                self.cache = EmbeddingCache(self.cache_dir, self.model_key, dim, self.cache_max_entries, self.cache_dtype)
+            self._model = model
+
+    @property
+    def model(self):
+        if self._model is None:
+            self.load()
+        return self._model
+
+    @property
+    def ready(self) -> bool:
+        return self._model is not None
+
+    def _encode(self, texts: list[str]):
+        return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+    def embed(self, texts: list[str], cache: bool = True) -> list[list[float]]:
+        self.load()
+        if self.cache is None or not cache or not texts:
+            return self._encode(texts).tolist()
 
-    def embed(self, texts: list[str]) -> list[list[float]]:
-        vectors = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        vectors, missing = self.cache.lookup(texts)
+        if missing:
+            fresh = self._encode([texts[i] for i in missing])
+            vectors[missing] = fresh
+            self.cache.store([texts[i] for i in missing], fresh)
         return vectors.tolist()
 
     def embed_one(self, text: str) -> list[float]:
-        return self.embed([text])[0]
+        return self.embed([text], cache=False)[0]
+
+    def flush_cache(self) -> None:
+        if self.cache is not None:
+            self.cache.flush()
+
+    def cache_stats(self) -> dict | None:
+        return self.cache.stats() if self.cache is not None else None
 
     @property
     def dimension(self) -> int:
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from app.services.llm_service import LocalLLMService
+
+logger = logging.getLogger(__name__)
+
+_Request = tuple[str, str | None, asyncio.Future, float, asyncio.TimerHandle]
+
+
+class GenerationRejected(Exception):
+    def __init__(self, detail: str, status_code: int, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class GenerationScheduler:
+    def __init__(
+        self,
+        llm: LocalLLMService,
+        max_concurrency: int = 1,
+        max_queue: int = 16,
+        max_batch_size: int = 4,
+        max_wait_ms: float = 10.0,
+        queue_timeout_sec: float = 60.0,
+    ):
+        self.llm = llm
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_queue = max(max_queue, 0)
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max(max_wait_ms, 0.0) / 1000
+        self.queue_timeout = queue_timeout_sec
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.wait_seconds = 0.0
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._queue: asyncio.Queue[_Request] | None = None
+        self._dispatcher: asyncio.Task | None = None
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm")
+
+    def _admit(self) -> float:
+        self.ensure_capacity()
+        self.waiting += 1
+        return time.monotonic()
+
+    def ensure_capacity(self) -> None:
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise GenerationRejected("Generation queue is full, retry later", 429, self._retry_after())
+
+    def _retry_after(self) -> int:
+        return max(1, int(self.queue_timeout / 4))
+
+    def _expired(self, enqueued: float) -> bool:
+        return time.monotonic() - enqueued > self.queue_timeout
+
+    def _started(self, enqueued: float) -> None:
+        self.waiting -= 1
+        self.running += 1
+        self.wait_seconds += time.monotonic() - enqueued
+
+    def _timed_out(self) -> GenerationRejected:
+        self.waiting -= 1
+        self.timed_out += 1
+        return GenerationRejected("Generation queue wait timed out", 503, self._retry_after())
+
+    async def generate(self, prompt: str, prefix: str | None = None) -> str:
+        enqueued = self._admit()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._queue = asyncio.Queue()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        timer = loop.call_later(self.queue_timeout, self._expire, future)
+        self._queue.put_nowait((prompt, prefix, future, enqueued, timer))
+        try:
+            return await future
+        finally:
+            timer.cancel()
+
+    def _expire(self, future: asyncio.Future) -> None:
+        if not future.done():
+            future.set_exception(self._timed_out())
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            await self._slots.acquire()
+            try:
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except TimeoutError:
+                        break
+            except BaseException:
+                self._slots.release()
+                raise
+
+            live = []
+            for item in batch:
+                _, _, future, enqueued, timer = item
+                timer.cancel()
+                if future.cancelled():
+                    self.waiting -= 1
+                elif future.done():
+                    continue
+                elif self._expired(enqueued):
+                    future.set_exception(self._timed_out())
+                else:
+                    self._started(enqueued)
+                    live.append(item)
+            if not live:
+                self._slots.release()
+                continue
+            asyncio.create_task(self._execute(live))
+
+    async def _execute(self, batch: list[_Request]) -> None:
+        loop = asyncio.get_running_loop()
+        self.batches += 1
+        self.batched_requests += len(batch)
+        try:
+            outputs = await loop.run_in_executor(
+                self._executor, self.llm.generate_batch, [item[0] for item in batch], [item[1] for item in batch]
+            )
+        except Exception as exc:
+            logger.exception("Generation batch of %d failed", len(batch))
+            for _, _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for (_, _, future, _, _), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+        finally:
+            self.running -= len(batch)
+            self.completed += len(batch)
+            self._slots.release()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        enqueued = self._admit()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except TimeoutError:
+            raise self._timed_out() from None
+        except BaseException:
+            self.waiting -= 1
+            raise
+        self._started(enqueued)
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        started = self.completed + self.running
+        return {
+            "queue_depth": self.waiting,
+            "running": self.running,
+            "max_queue": self.max_queue,
+            "max_concurrency": self.max_concurrency,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+            "avg_wait_ms": round(self.wait_seconds / started * 1000, 2) if started else 0.0,
+        }
+
+    async def close(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,36 +1,100 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import logging
+import threading
+from collections.abc import Callable, Iterator
 from pathlib import Path
 
 from app.models.schemas import GraphEdge, GraphNode, GraphResponse
-from app.services.parser import MarkdownParser
+from app.services.link_graph import LinkGraph
+from app.services.workers import ParsePool
+
+logger = logging.getLogger(__name__)
+
+STREAM_BATCH = 512
+
+
+def encode_cursor(file_rel: str | None) -> str | None:
+    if file_rel is None:
+        return None
+    return base64.urlsafe_b64encode(file_rel.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> str | None:
+    if not cursor:
+        return None
+    try:
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid graph cursor") from exc
 
 
 class VaultGraphService:
-    def __init__(self, vault_path: Path, parser: MarkdownParser):
+    def __init__(self, vault_path: Path, parse_pool: ParsePool, links: LinkGraph | None = None):
         self.vault_path = vault_path
-        self.parser = parser
-
-    def build_graph(self) -> GraphResponse:
-        nodes: list[GraphNode] = []
-        edges: list[GraphEdge] = []
-
-        files = list(self.vault_path.rglob("*.md"))
-        existing = {f.stem for f in files}
-
-        for md in files:
-            parsed = self.parser.parse(md)
-            rel = md.relative_to(self.vault_path).as_posix()
-            nodes.append(GraphNode(id=rel, title=parsed.title))
-            for link in parsed.links:
-                if link in existing:
-                    target = next((f for f in files if f.stem == link), None)
-                    if target is not None:
-                        edges.append(
-                            GraphEdge(
-                                source=rel,
-                                target=target.relative_to(self.vault_path).as_posix(),
-                            )
-                        )
-
-        return GraphResponse(nodes=nodes, edges=edges)
+        self.parse_pool = parse_pool
+        self.links = links if links is not None else LinkGraph()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self, rows: list[tuple[str, str, list[str], list[str]]]) -> None:
+        self.links.load(rows)
+        self._loaded = bool(rows)
+        logger.info("Link graph loaded with %d notes", len(rows))
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            files = list(self.vault_path.rglob("*.md"))
+            for md, title, links, aliases in self.parse_pool.parse_links(files):
+                self.links.update(md.relative_to(self.vault_path).as_posix(), title, links, aliases)
+            self._loaded = True
+            logger.info("Link graph bootstrapped from %d notes", len(files))
+
+    def _node(self, file_rel: str) -> GraphNode:
+        return GraphNode(id=file_rel, title=self.links.title(file_rel))
+
+    def page(self, cursor: str | None = None, limit: int | None = None) -> tuple[list[str], str | None]:
+        self._ensure_loaded()
+        file_rels, last = self.links.page(decode_cursor(cursor), limit)
+        return file_rels, encode_cursor(last)
+
+    def payload(self, file_rels: list[str], next_cursor: str | None) -> dict:
+        return {
+            "nodes": [{"id": rel, "title": title} for rel, title in self.links.titled(file_rels)],
+            "edges": [{"source": s, "target": t} for s, t in self.links.edges_from(file_rels)],
+            "next_cursor": next_cursor,
+        }
+
+    def iter_ndjson(
+        self, file_rels: list[str], next_cursor: str | None, dumps: Callable[[object], bytes]
+    ) -> Iterator[bytes]:
+        nodes = edges = 0
+        for i in range(0, len(file_rels), STREAM_BATCH):
+            batch = self.links.titled(file_rels[i : i + STREAM_BATCH])
+            nodes += len(batch)
+            yield b"".join(dumps({"type": "node", "id": rel, "title": title}) + b"\n" for rel, title in batch)
+        for i in range(0, len(file_rels), STREAM_BATCH):
+            batch = self.links.edges_from(file_rels[i : i + STREAM_BATCH])
+            edges += len(batch)
+            yield b"".join(dumps({"type": "edge", "source": s, "target": t}) + b"\n" for s, t in batch)
+        yield dumps({"type": "end", "nodes": nodes, "edges": edges, "next_cursor": next_cursor}) + b"\n"
+
+    def find(self, note: str) -> str | None:
+        self._ensure_loaded()
+        return self.links.find(note)
+
+    def backlinks(self, file_rel: str) -> list[GraphNode]:
+        return [self._node(rel) for rel in self.links.backlinks(file_rel)]
+
+    def neighborhood(self, file_rel: str, depth: int, direction: str = "both") -> GraphResponse:
+        nodes, edges = self.links.neighborhood(file_rel, depth, direction)
+        return GraphResponse(
+            nodes=[self._node(rel) for rel in nodes],
+            edges=[GraphEdge(source=s, target=t) for s, t in edges],
+        )
@@ -1,15 +1,32 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
+from collections.abc import Callable
+from concurrent.futures import Executor
 from datetime import datetime
 from pathlib import Path
 
 from app.models.schemas import IndexStats
-from app.services.chunker import SectionAwareChunker
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.bm25 import BM25Index
+from app.services.docstore import DocumentStore
 from app.services.embeddings import EmbeddingService
-from app.services.parser import MarkdownParser
-from app.services.qdrant_service import QdrantService
+from app.services.link_graph import LinkGraph, note_aliases
+from app.services.manifest import FileRecord, IndexManifest, hash_bytes
+from app.services.pipeline import FilePlan, IndexPipeline, PipelineResult
+from app.services.priority import InteractiveGate
+from app.services.query_cache import IndexGeneration
+from app.services.qdrant_service import (
+    QdrantService,
+    QdrantWriteError,
+    folder_prefixes,
+    frontmatter_terms,
+    note_tags,
+    point_id,
+)
+from app.services.workers import ParsePool
 
 logger = logging.getLogger(__name__)
 
@@ -18,75 +35,261 @@ class VaultIndexer:
     def __init__(
         self,
         vault_path: Path,
-        parser: MarkdownParser,
-        chunker: SectionAwareChunker,
+        parse_pool: ParsePool,
         embedder: EmbeddingService,
         qdrant: QdrantService,
+        manifest: IndexManifest,
+        store: DocumentStore,
+        bm25: BM25Index,
+        links: LinkGraph,
+        generation: IndexGeneration,
+        answer_cache: SemanticAnswerCache,
+        embed_batch_size: int = 64,
+        upsert_batch_size: int = 256,
+        queue_depth: int = 8,
+        executor: Executor | None = None,
+        gate: InteractiveGate | None = None,
+        save_delay: float = 5.0,
     ):
         self.vault_path = vault_path
-        self.parser = parser
-        self.chunker = chunker
+        self.parse_pool = parse_pool
         self.embedder = embedder
         self.qdrant = qdrant
+        self.manifest = manifest
+        self.store = store
+        self.bm25 = bm25
+        self.links = links
+        self.generation = generation
+        self.answer_cache = answer_cache
+        self.executor = executor
+        self.pipeline = IndexPipeline(
+            self._plan_file,
+            self._finalize,
+            embedder,
+            qdrant,
+            embed_batch_size=embed_batch_size,
+            upsert_batch_size=upsert_batch_size,
+            queue_depth=queue_depth,
+            parse_concurrency=parse_pool.workers,
+            executor=executor,
+            gate=gate,
+        )
+        self.save_delay = save_delay
         self._lock = asyncio.Lock()
+        self._save_task: asyncio.Task | None = None
 
-    async def full_index(self) -> IndexStats:
+    async def _run(self, fn: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def full_index(
+        self,
+        force_full: bool = False,
+        progress: PipelineResult | None = None,
+        on_start: Callable[[], None] | None = None,
+    ) -> IndexStats:
         async with self._lock:
-            files = list(self.vault_path.rglob("*.md"))
-            logger.info("Found %d markdown files", len(files))
+            if on_start is not None:
+                on_start()
+            if self.manifest.stale:
+                logger.info("Index manifest is missing or outdated; clearing indexes for a full rebuild")
+                await self._clear()
+                force_full = True
+            if not force_full and len(self.manifest) and await self.qdrant.count() == 0:
+                logger.info("Collection is empty but manifest is not; forcing full rebuild")
+                force_full = True
+            if not force_full and len(self.manifest) and not (len(self.bm25) and len(self.store)):
+                logger.info("Keyword index or document store is empty but manifest is not; forcing full rebuild")
+                force_full = True
+
+            result = await self._index(lambda: list(self.vault_path.rglob("*.md")), force_full, progress)
+            logger.info("Found %d markdown files", len(result.files))
 
-            files_indexed = 0
-            chunks_indexed = 0
+            seen = {self._rel(path) for path in result.files}
+            removed = [rel for rel in self.manifest.files if rel not in seen]
+            for file_rel in removed:
+                self._forget(file_rel)
+                await self.qdrant.delete_file(file_rel)
+            await self.qdrant.flush()
+            for file_rel in removed:
+                self.bm25.remove_file(file_rel)
+                await self._run(self.store.delete_file, file_rel)
+                self.links.remove(file_rel)
+                self.manifest.remove(file_rel)
+            files_removed = len(removed)
+            if result.files_indexed or files_removed:
+                self.generation.bump()
 
-            for path in files:
-                c = await self.index_file(path)
-                if c > 0:
-                    files_indexed += 1
-                    chunks_indexed += c
+            await self._save()
+            await self._run(self.embedder.flush_cache)
+            logger.info(
+                "Indexing done: %d indexed, %d unchanged, %d removed",
+                result.files_indexed,
+                result.files_skipped,
+                files_removed,
+            )
 
             return IndexStats(
-                files_seen=len(files),
-                files_indexed=files_indexed,
-                chunks_indexed=chunks_indexed,
+                files_seen=len(result.files),
+                files_indexed=result.files_indexed,
+                chunks_indexed=result.chunks_indexed,
+                files_skipped=result.files_skipped,
+                files_removed=files_removed,
+                stages=result.stages,
                 finished_at=datetime.utcnow(),
             )
 
     async def index_file(self, path: Path) -> int:
         if not path.exists() or path.suffix.lower() != ".md":
             return 0
+        async with self._lock:
+            result = await self._index(lambda: [path], False)
+            if result.files_indexed:
+                self.generation.bump()
+                self._schedule_save()
+        return result.chunks_indexed
 
-        parsed = self.parser.parse(path)
-        chunks = self.chunker.chunk_document(parsed)
-        if not chunks:
-            return 0
+    async def _index(
+        self, discover: Callable[[], list[Path]], force: bool, progress: PipelineResult | None = None
+    ) -> PipelineResult:
+        try:
+            return await self.pipeline.run(discover, force, progress)
+        except* QdrantWriteError as group:
+            failed = {file_rel for exc in group.exceptions for file_rel in exc.files}
+            for file_rel in failed:
+                self._forget(file_rel)
+                self.manifest.remove(file_rel)
+            self.generation.bump()
+            await self._save()
+            logger.error("Qdrant writes failed for %d file(s); they will be re-indexed on the next run", len(failed))
+            raise
 
-        vectors = self.embedder.embed([c.text for c in chunks])
-        file_rel = path.relative_to(self.vault_path).as_posix()
-        self.qdrant.delete_file(file_rel)
-
-        points = []
-        for chunk, vec in zip(chunks, vectors):
-            points.append(
-                {
-                    "chunk_id": chunk.chunk_id,
-                    "vector": vec,
-                    "payload": {
-                        "file_path": file_rel,
-                        "title": parsed.title,
-                        "heading": chunk.heading,
-                        "text": chunk.text,
-                        "tags": parsed.tags,
-                        "frontmatter": parsed.frontmatter,
-                        "links": parsed.links,
-                        "line_start": chunk.line_start,
-                        "line_end": chunk.line_end,
-                    },
-                }
-            )
+    async def _clear(self) -> None:
+        await self.qdrant.reset_collection(self.embedder.dimension)
+        self.bm25.clear()
+        await self._run(self.store.clear)
+        self.links.clear()
+        self.manifest.clear()
+        self.manifest.stale = False
+        self.generation.bump()
+
+    async def _save(self) -> None:
+        await self._run(self.manifest.save)
+        await self._run(self.bm25.save)
 
-        self.qdrant.upsert_chunks(points)
-        logger.info("Indexed %s (%d chunks)", file_rel, len(points))
-        return len(points)
+    def _schedule_save(self) -> None:
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._delayed_save())
+
+    async def _delayed_save(self) -> None:
+        await asyncio.sleep(self.save_delay)
+        async with self._lock:
+            try:
+                await self._save()
+            except Exception:
+                logger.exception("Saving index state failed")
+
+    async def close(self) -> None:
+        if self._save_task is not None:
+            self._save_task.cancel()
+            self._save_task = None
+        async with self._lock:
+            await self._save()
+
+    def _rel(self, path: Path) -> str:
+        return path.relative_to(self.vault_path).as_posix()
+
+    async def _plan_file(self, path: Path, force: bool) -> FilePlan | None:
+        file_rel = self._rel(path)
+        stat = path.stat()
+        if not force and self.manifest.is_unchanged(file_rel, stat.st_mtime, stat.st_size):
+            return None
+
+        previous = self.manifest.get(file_rel)
+        known_hash = None if force or previous is None else previous.content_hash
+        chunked = await self.parse_pool.chunk_file(path, known_hash)
+        if chunked is None:
+            previous.mtime, previous.size = stat.st_mtime, stat.st_size
+            self.manifest.update(file_rel, previous)
+            return None
+
+        chunks = {point_id(c.chunk_id): c for c in chunked.to_chunks()}
+        tags = note_tags(chunked.tags, chunked.frontmatter)
+        document = {
+            "title": chunked.title,
+            "tags": tags,
+            "frontmatter": chunked.frontmatter,
+            "links": chunked.links,
+        }
+        meta = {
+            "tags": tags,
+            "folders": folder_prefixes(file_rel),
+            "fm": frontmatter_terms(chunked.frontmatter),
+        }
+        meta_hash = hash_bytes(json.dumps(meta, sort_keys=True, default=str).encode("utf-8"))
+        meta["modified_at"] = document["modified_at"] = stat.st_mtime
+
+        replace = previous is None or force
+        old_chunks = {} if replace else previous.chunks
+        meta_changed = previous is not None and previous.meta_hash != meta_hash
+
+        retained = [pid for pid in chunks if pid in old_chunks]
+        patches = [(retained, dict(meta) if meta_changed else {"modified_at": stat.st_mtime})] if retained else []
+
+        return FilePlan(
+            file_rel=file_rel,
+            record=FileRecord(
+                mtime=stat.st_mtime,
+                size=stat.st_size,
+                content_hash=chunked.content_hash,
+                meta_hash=meta_hash,
+                chunks={pid: [c.line_start, c.line_end] for pid, c in chunks.items()},
+            ),
+            meta=meta,
+            document=document,
+            added=[c for pid, c in chunks.items() if pid not in old_chunks],
+            removed=[pid for pid in old_chunks if pid not in chunks],
+            moved=[
+                (pid, chunks[pid].line_start, chunks[pid].line_end)
+                for pid in retained
+                if old_chunks[pid] != [chunks[pid].line_start, chunks[pid].line_end]
+            ],
+            patches=patches,
+            replace=replace,
+        )
+
+    def _forget(self, file_rel: str) -> None:
+        previous = self.manifest.get(file_rel)
+        if previous is not None:
+            self.answer_cache.invalidate(previous.point_ids)
+
+    async def _finalize(self, plan: FilePlan) -> None:
+        if plan.replace:
+            self._forget(plan.file_rel)
+            await self.qdrant.delete_file(plan.file_rel, keep=plan.record.point_ids)
+            self.bm25.remove_file(plan.file_rel)
+        else:
+            await self.qdrant.delete_points(plan.removed, plan.file_rel)
+            self.bm25.remove_points(plan.removed)
+            self.answer_cache.invalidate(plan.removed + [pid for pid, _, _ in plan.moved])
+        await self.qdrant.set_payloads(plan.patches, plan.file_rel)
+        await self._run(
+            self.store.write_file, plan.file_rel, plan.document, plan.added, plan.removed, plan.moved, plan.replace
+        )
+        self.bm25.add(plan.file_rel, [(point_id(c.chunk_id), f"{c.heading or ''}\n{c.text}") for c in plan.added])
+        self.links.update(
+            plan.file_rel,
+            plan.document["title"],
+            plan.document["links"],
+            note_aliases(plan.document["frontmatter"]),
+        )
+        self.manifest.update(plan.file_rel, plan.record)
+        logger.info(
+            "Indexed %s (%d added, %d removed, %d moved)",
+            plan.file_rel,
+            len(plan.added),
+            len(plan.removed),
+            len(plan.moved),
+        )
 
     async def remove_file(self, path: Path) -> None:
         if path.suffix.lower() != ".md":
@@ -95,5 +298,14 @@ class VaultIndexer:
             file_rel = path.relative_to(self.vault_path).as_posix()
         except ValueError:
             return
-        self.qdrant.delete_file(file_rel)
+        async with self._lock:
+            self._forget(file_rel)
+            await self.qdrant.delete_file(file_rel)
+            await self.qdrant.flush()
+            self.bm25.remove_file(file_rel)
+            await self._run(self.store.delete_file, file_rel)
+            self.links.remove(file_rel)
+            self.manifest.remove(file_rel)
+            self.generation.bump()
+            self._schedule_save()
         logger.info("Removed %s from index", file_rel)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from uuid import uuid4
+
+from app.models.schemas import IndexJobStatus, IndexProgress, IndexStats
+from app.services.indexer import VaultIndexer
+from app.services.pipeline import PipelineResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IndexJob:
+    job_id: str
+    force_full: bool
+    created_at: datetime
+    status: str = "queued"
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    progress: PipelineResult = field(default_factory=PipelineResult)
+    stats: IndexStats | None = None
+    error: str | None = None
+    task: asyncio.Task | None = None
+
+    def to_status(self) -> IndexJobStatus:
+        return IndexJobStatus(
+            job_id=self.job_id,
+            status=self.status,
+            force_full=self.force_full,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            progress=IndexProgress(
+                files_seen=len(self.progress.files),
+                files_processed=self.progress.files_indexed + self.progress.files_skipped,
+                files_indexed=self.progress.files_indexed,
+                chunks_indexed=self.progress.chunks_indexed,
+            ),
+            stats=self.stats,
+            error=self.error,
+        )
+
+
+class IndexJobRunner:
+    def __init__(self, indexer: VaultIndexer, history: int = 50):
+        self.indexer = indexer
+        self.history = history
+        self.jobs: OrderedDict[str, IndexJob] = OrderedDict()
+
+    def submit(self, force_full: bool = False) -> IndexJob:
+        job = IndexJob(job_id=uuid4().hex, force_full=force_full, created_at=datetime.utcnow())
+        job.task = asyncio.create_task(self._run(job))
+        self.jobs[job.job_id] = job
+        while len(self.jobs) > self.history:
+            oldest = next(iter(self.jobs.values()))
+            if oldest.task is not None and not oldest.task.done():
+                break
+            self.jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> IndexJob | None:
+        return self.jobs.get(job_id)
+
+    async def _run(self, job: IndexJob) -> None:
+        try:
+            job.stats = await self.indexer.full_index(
+                force_full=job.force_full, progress=job.progress, on_start=lambda: self._started(job)
+            )
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as exc:
+            logger.exception("Index job %s failed", job.job_id)
+            job.status = "failed"
+            job.error = str(exc)
+        finally:
+            job.finished_at = datetime.utcnow()
+
+    def _started(self, job: IndexJob) -> None:
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+
+    async def shutdown(self) -> None:
+        tasks = [j.task for j in self.jobs.values() if j.task is not None and not j.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from collections.abc import Iterable
+from pathlib import PurePosixPath
+
+
+def link_key(link: str) -> str:
+    target = link.split("#", 1)[0].strip()
+    if target.lower().endswith(".md"):
+        target = target[:-3]
+    return target.casefold()
+
+
+def note_aliases(frontmatter: dict) -> list[str]:
+    value = frontmatter.get("aliases") or frontmatter.get("alias")
+    if isinstance(value, str):
+        value = [value]
+    elif not isinstance(value, (list, tuple)):
+        return []
+    return [alias for alias in (str(v).strip() for v in value if v is not None) if alias]
+
+
+def note_keys(file_rel: str, aliases: list[str]) -> set[str]:
+    path = link_key(file_rel)
+    return {path, PurePosixPath(path).name, *(link_key(a) for a in aliases)}
+
+
+class LinkGraph:
+    def __init__(self):
+        self._titles: dict[str, str] = {}
+        self._links: dict[str, set[str]] = {}
+        self._keys: dict[str, set[str]] = {}
+        self._by_key: dict[str, set[str]] = {}
+        self._inbound: dict[str, set[str]] = {}
+        self._order: list[str] | None = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def __contains__(self, file_rel: str) -> bool:
+        return file_rel in self._titles
+
+    def load(self, rows: Iterable[tuple[str, str, list[str], list[str]]]) -> None:
+        with self._lock:
+            self.clear()
+            for file_rel, title, links, aliases in rows:
+                self.update(file_rel, title, links, aliases)
+
+    def clear(self) -> None:
+        with self._lock:
+            for index in (self._titles, self._links, self._keys, self._by_key, self._inbound):
+                index.clear()
+            self._order = None
+
+    def update(self, file_rel: str, title: str, links: list[str], aliases: list[str]) -> None:
+        with self._lock:
+            self._detach(file_rel)
+            if file_rel not in self._titles:
+                self._order = None
+            self._titles[file_rel] = str(title)
+            self._links[file_rel] = {key for key in map(link_key, links) if key}
+            self._keys[file_rel] = note_keys(file_rel, aliases)
+            for key in self._links[file_rel]:
+                self._inbound.setdefault(key, set()).add(file_rel)
+            for key in self._keys[file_rel]:
+                self._by_key.setdefault(key, set()).add(file_rel)
+
+    def remove(self, file_rel: str) -> None:
+        with self._lock:
+            self._detach(file_rel)
+            if self._titles.pop(file_rel, None) is not None:
+                self._order = None
+
+    def _detach(self, file_rel: str) -> None:
+        for index, keys in (
+            (self._inbound, self._links.pop(file_rel, ())),
+            (self._by_key, self._keys.pop(file_rel, ())),
+        ):
+            for key in keys:
+                members = index.get(key)
+                if members is not None:
+                    members.discard(file_rel)
+                    if not members:
+                        del index[key]
+
+    def resolve(self, key: str) -> str | None:
+        candidates = self._by_key.get(key)
+        if not candidates:
+            return None
+        return min(candidates, key=lambda f: (f.count("/"), f))
+
+    def find(self, note: str) -> str | None:
+        with self._lock:
+            return note if note in self._titles else self.resolve(link_key(note))
+
+    def title(self, file_rel: str) -> str:
+        return self._titles[file_rel]
+
+    def nodes(self) -> list[tuple[str, str]]:
+        with self._lock:
+            return sorted(self._titles.items())
+
+    def page(self, after: str | None, limit: int | None) -> tuple[list[str], str | None]:
+        with self._lock:
+            if self._order is None:
+                self._order = sorted(self._titles)
+            order = self._order
+        start = 0 if after is None else bisect.bisect_right(order, after)
+        end = len(order) if limit is None else min(start + limit, len(order))
+        return order[start:end], order[end - 1] if end < len(order) else None
+
+    def titled(self, file_rels: list[str]) -> list[tuple[str, str]]:
+        with self._lock:
+            return [(rel, self._titles[rel]) for rel in file_rels if rel in self._titles]
+
+    def edges_from(self, file_rels: list[str]) -> list[tuple[str, str]]:
+        with self._lock:
+            return [(source, target) for source in file_rels for target in self.outgoing(source)]
+
+    def outgoing(self, file_rel: str) -> list[str]:
+        with self._lock:
+            return sorted({t for t in map(self.resolve, self._links.get(file_rel, ())) if t is not None})
+
+    def backlinks(self, file_rel: str) -> list[str]:
+        with self._lock:
+            return sorted(
+                {
+                    source
+                    for key in self._keys.get(file_rel, ())
+                    if self.resolve(key) == file_rel
+                    for source in self._inbound.get(key, ())
+                }
+            )
+
+    def edges(self) -> list[tuple[str, str]]:
+        return self.edges_from(self.page(None, None)[0])
+
+    def neighborhood(
+        self, file_rel: str, depth: int, direction: str = "both"
+    ) -> tuple[list[str], list[tuple[str, str]]]:
+        with self._lock:
+            seen = {file_rel}
+            frontier = [file_rel]
+            for _ in range(depth):
+                reached = set()
+                for note in frontier:
+                    if direction in ("out", "both"):
+                        reached.update(self.outgoing(note))
+                    if direction in ("in", "both"):
+                        reached.update(self.backlinks(note))
+                frontier = sorted(reached - seen)
+                seen.update(frontier)
+            nodes = sorted(seen)
+            edges = [(source, target) for source in nodes for target in self.outgoing(source) if target in seen]
+            return nodes, edges
@@ -1,29 +1,194 @@
 from __future__ import annotations
 
+import copy
 import logging
-
-from transformers import pipeline
+import queue
+import threading
+from collections.abc import Callable, Iterator
 
 logger = logging.getLogger(__name__)
 
 
 class LocalLLMService:
-    def __init__(self, model_name: str, max_new_tokens: int):
-        logger.info("Loading local LLM: %s", model_name)
-        self.generator = pipeline("text-generation", model=model_name)
+    def __init__(
+        self,
+        model_name: str,
+        max_new_tokens: int,
+        context_window: int = 0,
+        prefix_cache: bool = True,
+        stream_timeout: float = 60.0,
+    ):
+        self.model_name = model_name
         self.max_new_tokens = max_new_tokens
+        self.stream_timeout = stream_timeout
+        self.prefix_cache_enabled = prefix_cache
+        self._context_window = context_window
+        self._generator = None
+        self._lock = threading.Lock()
+        self._prefixes: dict[str, tuple] = {}
+        self._prefix_lock = threading.Lock()
+
+    def load(self) -> None:
+        with self._lock:
+            if self._generator is not None:
+                return
+            from transformers import pipeline
+
+            logger.info("Loading local LLM: %s", self.model_name)
+            generator = pipeline("text-generation", model=self.model_name)
+            if generator.tokenizer.pad_token_id is None:
+                generator.tokenizer.pad_token = generator.tokenizer.eos_token
+            generator.tokenizer.padding_side = "left"
+            self._generator = generator
+
+    @property
+    def generator(self):
+        if self._generator is None:
+            self.load()
+        return self._generator
+
+    @property
+    def ready(self) -> bool:
+        return self._generator is not None
+
+    @property
+    def context_window(self) -> int:
+        if not self._context_window:
+            config = self.generator.model.config
+            window = getattr(config, "max_position_embeddings", None) or getattr(config, "n_positions", None)
+            self._context_window = window or min(self.generator.tokenizer.model_max_length, 2048)
+        return self._context_window
+
+    @property
+    def prompt_budget(self) -> int:
+        return self.context_window - self.max_new_tokens
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.generator.tokenizer.encode(text, add_special_tokens=False))
 
-    def generate(self, prompt: str) -> str:
-        out = self.generator(
-            prompt,
+    def _generate_kwargs(self) -> dict:
+        return dict(
             max_new_tokens=self.max_new_tokens,
             do_sample=True,
             top_p=0.9,
             temperature=0.3,
-            num_return_sequences=1,
             pad_token_id=self.generator.tokenizer.eos_token_id,
         )
-        generated = out[0]["generated_text"]
-        if generated.startswith(prompt):
-            generated = generated[len(prompt) :]
-        return generated.strip()
+
+    def prefix_state(self, prefix: str) -> tuple:
+        prefix = prefix.rstrip()
+        with self._prefix_lock:
+            state = self._prefixes.get(prefix)
+            if state is None:
+                import torch
+
+                model = self.generator.model
+                ids = self.generator.tokenizer(prefix, return_tensors="pt").input_ids.to(model.device)
+                with torch.no_grad():
+                    past = model(input_ids=ids, use_cache=True).past_key_values
+                state = self._prefixes[prefix] = (ids, past)
+            return state
+
+    def warm_prefixes(self, prefixes: list[str]) -> None:
+        if self.prefix_cache_enabled:
+            for prefix in prefixes:
+                self.prefix_state(prefix)
+
+    def _inputs(self, prompt: str, prefix: str | None = None) -> dict:
+        tokenizer = self.generator.tokenizer
+        device = self.generator.model.device
+        inputs = dict(tokenizer(prompt, return_tensors="pt").to(device))
+        if not (self.prefix_cache_enabled and prefix and prefix.strip() and prompt.startswith(prefix)):
+            return inputs
+
+        import torch
+
+        prefix_ids, past = self.prefix_state(prefix)
+        input_ids = inputs["input_ids"]
+        n = prefix_ids.shape[1]
+        if input_ids.shape[1] <= n or not torch.equal(input_ids[0, :n], prefix_ids[0]):
+            return inputs
+        return {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids),
+            "past_key_values": copy.deepcopy(past),
+        }
+
+    def generate(self, prompt: str, prefix: str | None = None) -> str:
+        return self.generate_batch([prompt], [prefix])[0]
+
+    def generate_batch(self, prompts: list[str], prefixes: list[str | None] | None = None) -> list[str]:
+        if len(prompts) == 1 and prefixes and prefixes[0] and self.prefix_cache_enabled:
+            inputs = self._inputs(prompts[0], prefixes[0])
+            output = self.generator.model.generate(**inputs, **self._generate_kwargs())
+            new_tokens = output[0, inputs["input_ids"].shape[1] :]
+            return [self.generator.tokenizer.decode(new_tokens, skip_special_tokens=True).strip()]
+
+        outs = self.generator(
+            prompts,
+            batch_size=len(prompts),
+            num_return_sequences=1,
+            return_full_text=False,
+            **self._generate_kwargs(),
+        )
+        return [out[0]["generated_text"].strip() for out in outs]
+
+    def stream(self, prompt: str, prefix: str | None = None) -> TokenStream:
+        from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+        class _Cancelled(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs) -> bool:
+                return cancelled.is_set()
+
+        generator = self.generator
+        cancelled = threading.Event()
+        streamer = TextIteratorStreamer(
+            generator.tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=self.stream_timeout
+        )
+        inputs = self._inputs(prompt, prefix)
+        stream = TokenStream(streamer, cancelled)
+        stream.start(
+            generator.model.generate,
+            **inputs,
+            stopping_criteria=StoppingCriteriaList([_Cancelled()]),
+            **self._generate_kwargs(),
+        )
+        return stream
+
+
+class TokenStream:
+    def __init__(self, streamer, cancelled: threading.Event):
+        self._streamer = streamer
+        self._cancelled = cancelled
+        self._error: BaseException | None = None
+
+    def start(self, generate: Callable, **kwargs) -> None:
+        threading.Thread(target=self._run, args=(generate, kwargs), daemon=True).start()
+
+    def _run(self, generate: Callable, kwargs: dict) -> None:
+        try:
+            generate(streamer=self._streamer, **kwargs)
+        except BaseException as exc:
+            logger.exception("Streaming generation failed")
+            self._error = exc
+            self._streamer.end()
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        while True:
+            try:
+                text = next(self._streamer)
+            except StopIteration:
+                if self._error is not None:
+                    raise RuntimeError(f"Generation failed: {self._error}") from self._error
+                raise
+            except queue.Empty:
+                self.close()
+                raise TimeoutError("Generation produced no tokens before the stream timeout") from None
+            if text:
+                return text
+
+    def close(self) -> None:
+        self._cancelled.set()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 5
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@dataclass
+class FileRecord:
+    mtime: float
+    size: int
+    content_hash: str
+    meta_hash: str = ""
+    chunks: dict[str, list[int]] = field(default_factory=dict)
+
+    @property
+    def point_ids(self) -> list[str]:
+        return list(self.chunks)
+
+
+class IndexManifest:
+    def __init__(self, path: Path, collection_name: str, embedding_model: str):
+        self.path = path
+        self.collection_name = collection_name
+        self.embedding_model = embedding_model
+        self.files: dict[str, FileRecord] = {}
+        self.stale = False
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            logger.warning("Index manifest at %s is unreadable; starting fresh", self.path)
+            self.stale = True
+            return
+
+        if (
+            raw.get("version") != MANIFEST_VERSION
+            or raw.get("collection") != self.collection_name
+            or raw.get("embedding_model") != self.embedding_model
+        ):
+            logger.info("Index manifest at %s is stale; starting fresh", self.path)
+            self.stale = True
+            self._dirty = True
+            return
+
+        self.files = {rel: FileRecord(**rec) for rel, rec in raw.get("files", {}).items()}
+
+    def get(self, file_rel: str) -> FileRecord | None:
+        return self.files.get(file_rel)
+
+    def is_unchanged(self, file_rel: str, mtime: float, size: int) -> bool:
+        rec = self.files.get(file_rel)
+        return rec is not None and rec.mtime == mtime and rec.size == size
+
+    def update(self, file_rel: str, record: FileRecord) -> None:
+        self.files[file_rel] = record
+        self._dirty = True
+
+    def remove(self, file_rel: str) -> FileRecord | None:
+        rec = self.files.pop(file_rel, None)
+        if rec is not None:
+            self._dirty = True
+        return rec
+
+    def clear(self) -> None:
+        if self.files:
+            self.files = {}
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "collection": self.collection_name,
+            "embedding_model": self.embedding_model,
+            "files": {rel: asdict(rec) for rel, rec in self.files.items()},
+        }
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self.files)
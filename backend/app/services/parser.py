@@ -25,7 +25,10 @@ class ParsedDocument:
 
 class MarkdownParser:
     def parse(self, path: Path) -> ParsedDocument:
-        post = frontmatter.load(path)
+        return self.parse_text(path, path.read_text(encoding="utf-8"))
+
+    def parse_text(self, path: Path, text: str) -> ParsedDocument:
+        post = frontmatter.loads(text)
         body = post.content or ""
         frontmatter_data = dict(post.metadata)
 
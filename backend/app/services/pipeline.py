@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.models.schemas import StageStats
+from app.services.chunker import Chunk
+from app.services.embeddings import EmbeddingService
+from app.services.priority import InteractiveGate
+from app.services.manifest import FileRecord
+from app.services.qdrant_service import QdrantService
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+@dataclass
+class FilePlan:
+    file_rel: str
+    record: FileRecord
+    meta: dict
+    document: dict
+    added: list[Chunk]
+    removed: list[str]
+    moved: list[tuple[str, int, int]]
+    patches: list[tuple[list[str], dict]]
+    replace: bool
+    pending: int = 0
+
+    def point(self, chunk: Chunk, vector: list[float]) -> dict:
+        return {
+            "chunk_id": chunk.chunk_id,
+            "vector": vector,
+            "payload": {"file_path": self.file_rel, **self.meta},
+        }
+
+
+@dataclass
+class _Stage:
+    items: int = 0
+    seconds: float = 0.0
+
+    def stats(self) -> StageStats:
+        rate = self.items / self.seconds if self.seconds > 0 else 0.0
+        return StageStats(items=self.items, seconds=round(self.seconds, 4), items_per_sec=round(rate, 2))
+
+
+@dataclass
+class PipelineResult:
+    files: list[Path] = field(default_factory=list)
+    files_indexed: int = 0
+    files_skipped: int = 0
+    chunks_indexed: int = 0
+    stages: dict[str, StageStats] = field(default_factory=dict)
+
+
+class IndexPipeline:
+    def __init__(
+        self,
+        plan_file: Callable[[Path, bool], Awaitable[FilePlan | None]],
+        finalize: Callable[[FilePlan], Awaitable[None]],
+        embedder: EmbeddingService,
+        qdrant: QdrantService,
+        embed_batch_size: int,
+        upsert_batch_size: int,
+        queue_depth: int,
+        parse_concurrency: int = 1,
+        executor: Executor | None = None,
+        gate: InteractiveGate | None = None,
+    ):
+        self.plan_file = plan_file
+        self.finalize = finalize
+        self.embedder = embedder
+        self.qdrant = qdrant
+        self.embed_batch_size = max(embed_batch_size, 1)
+        self.upsert_batch_size = max(upsert_batch_size, 1)
+        self.queue_depth = max(queue_depth, 1)
+        self.parse_concurrency = max(parse_concurrency, 1)
+        self.executor = executor
+        self.gate = gate or InteractiveGate()
+
+    async def _run(self, fn: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def run(
+        self, discover: Callable[[], list[Path]], force: bool, result: PipelineResult | None = None
+    ) -> PipelineResult:
+        result = result or PipelineResult()
+        stages = {name: _Stage() for name in ("discover", "parse", "embed", "upsert")}
+        paths: asyncio.Queue = asyncio.Queue(self.queue_depth)
+        plans: asyncio.Queue = asyncio.Queue(self.queue_depth)
+        batches: asyncio.Queue = asyncio.Queue(self.queue_depth)
+
+        async def discover_stage() -> None:
+            started = time.perf_counter()
+            result.files = await self._run(discover)
+            stages["discover"].items = len(result.files)
+            stages["discover"].seconds = time.perf_counter() - started
+            for path in result.files:
+                await paths.put(path)
+            for _ in range(self.parse_concurrency):
+                await paths.put(_DONE)
+
+        async def parse_stage() -> None:
+            started = time.perf_counter()
+            async with asyncio.TaskGroup() as parsers:
+                for _ in range(self.parse_concurrency):
+                    parsers.create_task(parse_worker())
+            stages["parse"].seconds = time.perf_counter() - started
+            await plans.put(_DONE)
+
+        async def parse_worker() -> None:
+            while (path := await paths.get()) is not _DONE:
+                stages["parse"].items += 1
+                try:
+                    plan = await self.plan_file(path, force)
+                except Exception:
+                    logger.exception("Failed to parse %s", path)
+                    continue
+                if plan is None:
+                    result.files_skipped += 1
+                    continue
+                plan.pending = len(plan.added)
+                await plans.put(plan)
+
+        async def embed_stage() -> None:
+            batch: list[tuple[FilePlan, Chunk]] = []
+            while (plan := await plans.get()) is not _DONE:
+                if not plan.added:
+                    await batches.put(([], [], plan))
+                    continue
+                for chunk in plan.added:
+                    batch.append((plan, chunk))
+                    if len(batch) >= self.embed_batch_size:
+                        await embed_batch(batch)
+                        batch = []
+            if batch:
+                await embed_batch(batch)
+            await batches.put(_DONE)
+
+        async def embed_batch(batch: list[tuple[FilePlan, Chunk]]) -> None:
+            await self.gate.wait_idle()
+            started = time.perf_counter()
+            vectors = await self._run(self.embedder.embed, [c.text for _, c in batch])
+            stages["embed"].items += len(batch)
+            stages["embed"].seconds += time.perf_counter() - started
+            await batches.put((batch, vectors, None))
+
+        async def upsert_stage() -> None:
+            buffer: list[tuple[FilePlan, dict]] = []
+            while (item := await batches.get()) is not _DONE:
+                batch, vectors, bare_plan = item
+                if bare_plan is not None:
+                    await complete(bare_plan)
+                    continue
+                buffer.extend((plan, plan.point(chunk, vec)) for (plan, chunk), vec in zip(batch, vectors))
+                if len(buffer) >= self.upsert_batch_size:
+                    await flush(buffer)
+                    buffer = []
+            if buffer:
+                await flush(buffer)
+            started = time.perf_counter()
+            await self.qdrant.flush()
+            stages["upsert"].seconds += time.perf_counter() - started
+
+        async def flush(buffer: list[tuple[FilePlan, dict]]) -> None:
+            await self.gate.wait_idle()
+            started = time.perf_counter()
+            await self.qdrant.upsert_chunks([point for _, point in buffer])
+            stages["upsert"].items += len(buffer)
+            stages["upsert"].seconds += time.perf_counter() - started
+            for plan, _ in buffer:
+                plan.pending -= 1
+                if plan.pending == 0:
+                    await complete(plan)
+
+        async def complete(plan: FilePlan) -> None:
+            await self.finalize(plan)
+            result.files_indexed += 1
+            result.chunks_indexed += len(plan.added)
+
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(discover_stage())
+            tg.create_task(parse_stage())
+            tg.create_task(embed_stage())
+            tg.create_task(upsert_stage())
+
+        result.stages = {name: stage.stats() for name, stage in stages.items()}
+        return result
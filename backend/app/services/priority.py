@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class InteractiveGate:
+    def __init__(self, max_yield_sec: float = 0.5):
+        self.max_yield_sec = max_yield_sec
+        self._active = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @asynccontextmanager
+    async def interactive(self):
+        self._active += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._active -= 1
+            if self._active == 0:
+                self._idle.set()
+
+    async def wait_idle(self) -> None:
+        if self._active == 0:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=self.max_yield_sec)
+        except TimeoutError:
+            pass
+
+    @property
+    def active(self) -> int:
+        return self._active
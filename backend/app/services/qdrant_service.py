@@ -1,88 +1,384 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections.abc import Awaitable, Iterable
+from datetime import date
 from uuid import uuid5, NAMESPACE_URL
 
-from qdrant_client import QdrantClient
+import httpx
+import numpy as np
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Disabled,
     Distance,
     FieldCondition,
     Filter,
     FilterSelector,
+    HasIdCondition,
+    HnswConfigDiff,
     MatchValue,
+    QuantizationSearchParams,
+    Range,
     PayloadSchemaType,
+    PointIdsList,
     PointStruct,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    SearchRequest,
+    SetPayload,
+    SetPayloadOperation,
     VectorParams,
+    VectorParamsDiff,
 )
 
-from app.models.schemas import SourceItem
+from app.models.schemas import SearchFilters
 
 logger = logging.getLogger(__name__)
 
 
+QUANTIZATION_MODES = ("", "scalar", "binary")
+
+PAYLOAD_INDEXES = {
+    "file_path": PayloadSchemaType.KEYWORD,
+    "folders": PayloadSchemaType.KEYWORD,
+    "tags": PayloadSchemaType.KEYWORD,
+    "fm": PayloadSchemaType.KEYWORD,
+    "modified_at": PayloadSchemaType.FLOAT,
+}
+
+
+class QdrantWriteError(Exception):
+    def __init__(self, detail: str, files: set[str]):
+        super().__init__(detail)
+        self.files = files
+
+
+def point_id(chunk_id: str) -> str:
+    return str(uuid5(NAMESPACE_URL, chunk_id))
+
+
+def folder_prefixes(file_rel: str) -> list[str]:
+    parts = file_rel.split("/")[:-1]
+    return ["/".join(parts[: i + 1]) for i in range(len(parts))]
+
+
+def frontmatter_terms(frontmatter: dict) -> list[str]:
+    terms = set()
+    for key, value in frontmatter.items():
+        for item in value if isinstance(value, list) else [value]:
+            if isinstance(item, date):
+                item = item.isoformat()
+            if isinstance(item, (str, int, float, bool)):
+                terms.add(f"{key}={item}")
+    return sorted(terms)
+
+
+def note_tags(inline: list[str], frontmatter: dict) -> list[str]:
+    value = frontmatter.get("tags") or frontmatter.get("tag") or []
+    if isinstance(value, str):
+        value = value.replace(",", " ").split()
+    elif not isinstance(value, (list, tuple)):
+        value = [value]
+    declared = (str(v).strip().lstrip("#") for v in value if v is not None)
+    return sorted({*inline, *(tag for tag in declared if tag)})
+
+
+def build_filter(filters: SearchFilters | None) -> Filter | None:
+    if filters is None:
+        return None
+    must = [FieldCondition(key="tags", match=MatchValue(value=tag.lstrip("#"))) for tag in filters.tags]
+    if filters.folder and filters.folder.strip("/"):
+        must.append(FieldCondition(key="folders", match=MatchValue(value=filters.folder.strip("/"))))
+    must += [
+        FieldCondition(key="fm", match=MatchValue(value=f"{key}={value}"))
+        for key, value in filters.frontmatter.items()
+    ]
+    if filters.modified_after or filters.modified_before:
+        must.append(
+            FieldCondition(
+                key="modified_at",
+                range=Range(
+                    gte=filters.modified_after.timestamp() if filters.modified_after else None,
+                    lte=filters.modified_before.timestamp() if filters.modified_before else None,
+                ),
+            )
+        )
+    return Filter(must=must) if must else None
+
+
 class QdrantService:
-    def __init__(self, url: str, collection_name: str, vector_size: int):
+    def __init__(
+        self,
+        url: str,
+        collection_name: str,
+        prefer_grpc: bool = False,
+        grpc_port: int = 6334,
+        max_connections: int = 16,
+        max_inflight_writes: int = 4,
+        timeout: int = 30,
+        hnsw_m: int = 16,
+        hnsw_ef_construct: int = 100,
+        search_ef: int = 0,
+        on_disk: bool = False,
+        quantization: str = "",
+        quantization_always_ram: bool = True,
+        rescore: bool = True,
+        oversampling: float = 2.0,
+    ):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown Qdrant quantization {quantization!r}; expected one of {QUANTIZATION_MODES}")
         self.collection_name = collection_name
-        self.client = QdrantClient(url=url)
-        self._ensure_collection(vector_size)
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+        self.search_ef = search_ef
+        self.on_disk = on_disk
+        self.quantization = quantization
+        self.quantization_always_ram = quantization_always_ram
+        self.rescore = rescore
+        self.oversampling = oversampling
+        self.client = AsyncQdrantClient(
+            url=url,
+            prefer_grpc=prefer_grpc,
+            grpc_port=grpc_port,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self.ready = False
+        self._write_slots = asyncio.Semaphore(max(max_inflight_writes, 1))
+        self._pending: set[asyncio.Task] = set()
+        self._errors: list[BaseException] = []
+        self._failed_files: set[str] = set()
+        self._dirty = False
 
-    def _ensure_collection(self, vector_size: int) -> None:
-        collections = self.client.get_collections().collections
+    def _quantization_config(self) -> ScalarQuantization | BinaryQuantization | None:
+        if self.quantization == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8, quantile=0.99, always_ram=self.quantization_always_ram
+                )
+            )
+        if self.quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=self.quantization_always_ram))
+        return None
+
+    async def ensure_collection(self, vector_size: int) -> None:
+        collections = (await self.client.get_collections()).collections
         names = {c.name for c in collections}
+        existing: set[str] = set()
+        hnsw = HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
         if self.collection_name not in names:
             logger.info("Creating collection %s", self.collection_name)
-            self.client.create_collection(
+            await self.client.create_collection(
                 collection_name=self.collection_name,
-                vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+                vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE, on_disk=self.on_disk),
+                hnsw_config=hnsw,
+                quantization_config=self._quantization_config(),
             )
-            self.client.create_payload_index(
-                self.collection_name, field_name="file_path", field_schema=PayloadSchemaType.KEYWORD
+        else:
+            info = await self.client.get_collection(self.collection_name)
+            existing = set(info.payload_schema or {})
+            await self._update_collection(info, hnsw)
+        for field_name, schema in PAYLOAD_INDEXES.items():
+            if field_name not in existing:
+                logger.info("Creating payload index %s on %s", field_name, self.collection_name)
+                await self.client.create_payload_index(
+                    self.collection_name, field_name=field_name, field_schema=schema, wait=True
+                )
+        self.ready = True
+
+    async def reset_collection(self, vector_size: int) -> None:
+        await self.flush()
+        logger.info("Dropping collection %s for a full rebuild", self.collection_name)
+        await self.client.delete_collection(self.collection_name)
+        await self.ensure_collection(vector_size)
+
+    async def _update_collection(self, info, hnsw: HnswConfigDiff) -> None:
+        changes = {}
+        current_hnsw = info.config.hnsw_config
+        if (current_hnsw.m, current_hnsw.ef_construct) != (hnsw.m, hnsw.ef_construct):
+            changes["hnsw_config"] = hnsw
+        vectors = info.config.params.vectors
+        if isinstance(vectors, VectorParams) and bool(vectors.on_disk) != self.on_disk:
+            changes["vectors_config"] = {"": VectorParamsDiff(on_disk=self.on_disk)}
+        current_quantization = info.config.quantization_config
+        wanted = self._quantization_config()
+        if type(current_quantization) is not type(wanted) or (
+            wanted is not None and current_quantization != wanted
+        ):
+            changes["quantization_config"] = wanted or Disabled.DISABLED
+        if changes:
+            logger.info("Updating collection %s: %s", self.collection_name, ", ".join(changes))
+            await self.client.update_collection(collection_name=self.collection_name, **changes)
+
+    def search_params(self, ef: int | None = None, rescore: bool | None = None, exact: bool = False) -> SearchParams:
+        quantization = None
+        if exact:
+            quantization = QuantizationSearchParams(ignore=True)
+        elif self.quantization:
+            quantization = QuantizationSearchParams(
+                rescore=self.rescore if rescore is None else rescore, oversampling=self.oversampling
             )
+        return SearchParams(
+            hnsw_ef=None if exact else (ef if ef is not None else self.search_ef) or None,
+            exact=exact,
+            quantization=quantization,
+        )
 
-    def upsert_chunks(self, points: list[dict]) -> None:
+    async def _submit(self, op: Awaitable, files: Iterable[str]) -> None:
+        await self._write_slots.acquire()
+        self._dirty = True
+        task = asyncio.ensure_future(op)
+        self._pending.add(task)
+        files = set(files)
+        task.add_done_callback(lambda t: self._write_done(t, files))
+
+    def _write_done(self, task: asyncio.Task, files: set[str]) -> None:
+        self._pending.discard(task)
+        self._write_slots.release()
+        if not task.cancelled() and task.exception() is not None:
+            self._errors.append(task.exception())
+            self._failed_files |= files
+
+    async def flush(self) -> None:
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+        if self._errors:
+            errors, self._errors = self._errors, []
+            files, self._failed_files = self._failed_files, set()
+            raise QdrantWriteError(
+                f"{len(errors)} Qdrant write(s) failed for {len(files)} file(s): {errors[0]}", files
+            ) from errors[0]
+        if self._dirty:
+            self._dirty = False
+            await self.client.delete(
+                collection_name=self.collection_name, points_selector=PointIdsList(points=[]), wait=True
+            )
+
+    async def upsert_chunks(self, points: list[dict]) -> None:
         qpoints = [
             PointStruct(
-                id=str(uuid5(NAMESPACE_URL, p["chunk_id"])),
+                id=point_id(p["chunk_id"]),
                 vector=p["vector"],
                 payload=p["payload"],
             )
             for p in points
         ]
         if qpoints:
-            self.client.upsert(collection_name=self.collection_name, points=qpoints, wait=True)
+            await self._submit(
+                self.client.upsert(collection_name=self.collection_name, points=qpoints, wait=False),
+                {p["payload"]["file_path"] for p in points},
+            )
 
-    def delete_file(self, file_path: str) -> None:
-        self.client.delete(
-            collection_name=self.collection_name,
-            points_selector=FilterSelector(
-                filter=Filter(must=[FieldCondition(key="file_path", match=MatchValue(value=file_path))])
+    async def delete_file(self, file_path: str, keep: list[str] | None = None) -> None:
+        await self._submit(
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(
+                    filter=Filter(
+                        must=[FieldCondition(key="file_path", match=MatchValue(value=file_path))],
+                        must_not=[HasIdCondition(has_id=keep)] if keep else None,
+                    )
+                ),
+                wait=False,
             ),
-            wait=True,
+            [file_path],
         )
 
-    def search(self, vector: list[float], limit: int) -> list[SourceItem]:
-        hits = self.client.search(
+    async def delete_points(self, point_ids: list[str], file_path: str) -> None:
+        if point_ids:
+            await self._submit(
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=PointIdsList(points=point_ids),
+                    wait=False,
+                ),
+                [file_path],
+            )
+
+    async def set_payloads(self, updates: list[tuple[list[str], dict]], file_path: str) -> None:
+        operations = [
+            SetPayloadOperation(set_payload=SetPayload(payload=payload, points=pids)) for pids, payload in updates
+        ]
+        if operations:
+            await self._submit(
+                self.client.batch_update_points(
+                    collection_name=self.collection_name, update_operations=operations, wait=False
+                ),
+                [file_path],
+            )
+
+    async def count(self) -> int:
+        return (await self.client.count(collection_name=self.collection_name, exact=True)).count
+
+    async def search(
+        self,
+        vector: list[float],
+        limit: int,
+        query_filter: Filter | None = None,
+        params: SearchParams | None = None,
+    ) -> list[tuple[str, float]]:
+        hits = await self.client.search(
             collection_name=self.collection_name,
             query_vector=vector,
+            query_filter=query_filter,
+            search_params=params or self.search_params(),
             limit=limit,
-            with_payload=True,
+            with_payload=False,
         )
-        return [
-            SourceItem(
-                file_path=hit.payload.get("file_path", ""),
-                score=float(hit.score),
-                title=hit.payload.get("title"),
-                heading=hit.payload.get("heading"),
-                snippet=hit.payload.get("text", "")[:300],
-                line_start=hit.payload.get("line_start"),
-                line_end=hit.payload.get("line_end"),
-            )
-            for hit in hits
-        ]
+        return [(str(hit.id), float(hit.score)) for hit in hits]
+
+    async def search_batch(
+        self, vectors: list[list[float]], limits: list[int], filters: list[Filter | None]
+    ) -> list[list[tuple[str, float]]]:
+        if not vectors:
+            return []
+        params = self.search_params()
+        batches = await self.client.search_batch(
+            collection_name=self.collection_name,
+            requests=[
+                SearchRequest(vector=vector, limit=limit, filter=query_filter, params=params, with_payload=False)
+                for vector, limit, query_filter in zip(vectors, limits, filters)
+            ],
+        )
+        return [[(str(hit.id), float(hit.score)) for hit in hits] for hits in batches]
 
-    def health(self) -> bool:
+    async def score_points(
+        self, point_ids: list[str], vector: list[float], query_filter: Filter | None = None
+    ) -> list[tuple[str, float]]:
+        if not point_ids:
+            return []
+        must = [HasIdCondition(has_id=point_ids)]
+        if query_filter is not None:
+            must += query_filter.must
+        records, _ = await self.client.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=Filter(must=must),
+            limit=len(point_ids),
+            with_payload=False,
+            with_vectors=True,
+        )
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scored = []
+        for record in records:
+            v = np.asarray(record.vector, dtype=np.float32)
+            scored.append((str(record.id), float(query @ v / (np.linalg.norm(v) or 1.0))))
+        return scored
+
+    async def health(self) -> bool:
         try:
-            self.client.get_collection(self.collection_name)
+            await self.client.get_collection(self.collection_name)
             return True
         except Exception:
             return False
+
+    async def close(self) -> None:
+        try:
+            await self.flush()
+        finally:
+            await self.client.close()
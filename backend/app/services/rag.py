@@ -1,12 +1,48 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
 from statistics import mean
 
-from app.models.schemas import QueryResponse, SourceItem
+from qdrant_client.http.models import Filter
+
+from app.models.schemas import QueryRequest, QueryResponse, SearchFilters, SourceItem
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.bm25 import BM25Index, reciprocal_rank_fusion
 from app.services.classifier import PROMPT_TEMPLATES, QueryRouterClassifier
+from app.services.context_packer import ContextPacker
+from app.services.docstore import DocumentStore
+from app.services.embed_batcher import EmbeddingBatcher
 from app.services.embeddings import EmbeddingService
+from app.services.generation import GenerationScheduler
 from app.services.llm_service import LocalLLMService
-from app.services.qdrant_service import QdrantService
+from app.services.qdrant_service import QdrantService, build_filter
+from app.services.query_cache import IndexGeneration, TTLCache, normalize_query
+
+SUMMARY_PREFIX = (
+    "You summarize technical markdown notes for a knowledge worker.\n"
+    "Return: 3-6 bullets and one short conclusion.\n\n"
+)
+
+
+@dataclass
+class QueryContext:
+    query: str
+    top_k: int
+    mode: str = "dense"
+    filters: SearchFilters | None = None
+    prompt_tokens: int | None = None
+    answer_key: tuple | None = None
+    generation: int = 0
+    vector: list[float] | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+
+    def record(self, stage: str, since: float) -> None:
+        self.timings[stage] = round((time.perf_counter() - since) * 1000, 2)
 
 
 class RAGService:
@@ -16,56 +52,307 @@ class RAGService:
         qdrant: QdrantService,
         llm: LocalLLMService,
         classifier: QueryRouterClassifier,
+        store: DocumentStore,
+        bm25: BM25Index,
+        generation: IndexGeneration,
+        answer_cache: SemanticAnswerCache,
         top_k_default: int,
+        batcher: EmbeddingBatcher | None = None,
+        results_cache: TTLCache | None = None,
+        vector_cache: TTLCache | None = None,
+        hybrid_candidates: int = 50,
+        rrf_k: int = 60,
+        scheduler: GenerationScheduler | None = None,
     ):
         self.embedder = embedder
         self.qdrant = qdrant
         self.llm = llm
         self.classifier = classifier
+        self.store = store
+        self.bm25 = bm25
+        self.generation = generation
+        self.answer_cache = answer_cache
         self.top_k_default = top_k_default
+        self.batcher = batcher or EmbeddingBatcher(embedder)
+        self.results_cache = results_cache or TTLCache(0)
+        self.vector_cache = vector_cache or TTLCache(0)
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        self.scheduler = scheduler or GenerationScheduler(llm)
+        self.packer = ContextPacker(llm.count_tokens)
+
+    def context(
+        self, query: str, top_k: int | None = None, mode: str = "dense", filters: SearchFilters | None = None
+    ) -> QueryContext:
+        return QueryContext(
+            query=query,
+            top_k=top_k or self.top_k_default,
+            mode=mode,
+            filters=filters,
+            generation=self.generation.value,
+        )
+
+    def _cache_key(self, ctx: QueryContext) -> tuple:
+        return (
+            normalize_query(ctx.query),
+            ctx.top_k,
+            ctx.mode,
+            ctx.filters.model_dump_json() if ctx.filters else None,
+            self.generation.value,
+        )
+
+    async def embed_query(self, ctx: QueryContext) -> list[float]:
+        if ctx.vector is None:
+            started = time.perf_counter()
+            key = normalize_query(ctx.query)
+            ctx.vector = self.vector_cache.get(key)
+            if ctx.vector is None:
+                ctx.vector = await self.batcher.embed_one(ctx.query)
+                self.vector_cache.put(key, ctx.vector)
+            ctx.record("embed_ms", started)
+        return ctx.vector
+
+    async def route(self, ctx: QueryContext) -> tuple[str, float, dict[str, float]]:
+        started = time.perf_counter()
+        result = await asyncio.to_thread(self.classifier.classify, ctx.query, ctx.vector)
+        ctx.record("route_ms", started)
+        return result
+
+    async def embed_queries(self, ctxs: list[QueryContext]) -> None:
+        started = time.perf_counter()
+        todo = []
+        for ctx in ctxs:
+            if ctx.vector is None:
+                ctx.vector = self.vector_cache.get(normalize_query(ctx.query))
+                if ctx.vector is None:
+                    todo.append(ctx)
+        if todo:
+            vectors = await self.batcher.embed_many([ctx.query for ctx in todo])
+            for ctx, vector in zip(todo, vectors):
+                ctx.vector = vector
+                self.vector_cache.put(normalize_query(ctx.query), vector)
+        for ctx in ctxs:
+            ctx.record("embed_ms", started)
 
-    def semantic_search(self, query: str, top_k: int | None = None) -> list[SourceItem]:
-        qvec = self.embedder.embed_one(query)
-        return self.qdrant.search(qvec, top_k or self.top_k_default)
+    async def retrieve(self, ctx: QueryContext) -> list[SourceItem]:
+        key = self._cache_key(ctx)
+        cached = self.results_cache.get(key)
+        if cached is not None:
+            return cached
+        await self.embed_query(ctx)
+        started = time.perf_counter()
+        query_filter = build_filter(ctx.filters)
+        if ctx.mode == "hybrid":
+            hits = await self._hybrid_search(ctx, query_filter)
+        else:
+            hits = await self.qdrant.search(ctx.vector, ctx.top_k, query_filter)
+        ctx.record("search_ms", started)
+        started = time.perf_counter()
+        sources = await asyncio.to_thread(self.store.sources, hits)
+        ctx.record("hydrate_ms", started)
+        if key[-1] == self.generation.value:
+            self.results_cache.put(key, sources)
+        return sources
+
+    async def _hybrid_search(self, ctx: QueryContext, query_filter: Filter | None) -> list[tuple[str, float]]:
+        candidates = max(self.hybrid_candidates, ctx.top_k)
+        dense, keyword = await asyncio.gather(
+            self.qdrant.search(ctx.vector, candidates, query_filter),
+            asyncio.to_thread(self.bm25.search, ctx.query, candidates),
+        )
+        return await self._fuse(ctx, dense, keyword, query_filter)
+
+    async def _fuse(
+        self,
+        ctx: QueryContext,
+        dense: list[tuple[str, float]],
+        keyword: list[tuple[str, float]],
+        query_filter: Filter | None,
+    ) -> list[tuple[str, float]]:
+        scores = dict(dense)
+        keyword_only = [pid for pid, _ in keyword if pid not in scores]
+        scores.update(await self.qdrant.score_points(keyword_only, ctx.vector, query_filter))
+        fused = reciprocal_rank_fusion(
+            [[pid for pid, _ in dense], [pid for pid, _ in keyword if pid in scores]], k=self.rrf_k
+        )
+        return [(pid, scores[pid]) for pid, _ in fused[: ctx.top_k]]
 
-    def answer(self, query: str, top_k: int | None = None) -> QueryResponse:
-        label, cls_conf, _ = self.classifier.classify(query)
-        sources = self.semantic_search(query, top_k)
+    async def retrieve_batch(self, ctxs: list[QueryContext]) -> list[list[SourceItem]]:
+        keys = [self._cache_key(ctx) for ctx in ctxs]
+        results: list[list[SourceItem] | None] = [self.results_cache.get(key) for key in keys]
+        pending = [i for i, cached in enumerate(results) if cached is None]
+        if not pending:
+            return results
 
-        context_block = "\n\n".join(
-            [
-                f"[source:{i+1}] file={s.file_path} heading={s.heading or '-'}\n{s.snippet}"
-                for i, s in enumerate(sources)
-            ]
+        todo = [ctxs[i] for i in pending]
+        await self.embed_queries(todo)
+        started = time.perf_counter()
+        filters = [build_filter(ctx.filters) for ctx in todo]
+        limits = [max(self.hybrid_candidates, ctx.top_k) if ctx.mode == "hybrid" else ctx.top_k for ctx in todo]
+        hybrid = [i for i, ctx in enumerate(todo) if ctx.mode == "hybrid"]
+        hits, *found = await asyncio.gather(
+            self.qdrant.search_batch([ctx.vector for ctx in todo], limits, filters),
+            *(asyncio.to_thread(self.bm25.search, todo[i].query, limits[i]) for i in hybrid),
+        )
+        keyword = dict(zip(hybrid, found))
+        fused = await asyncio.gather(
+            *[self._fuse(todo[i], hits[i], found, filters[i]) for i, found in keyword.items()]
         )
+        for i, found in zip(keyword, fused):
+            hits[i] = found
+        for ctx in todo:
+            ctx.record("search_ms", started)
+
+        started = time.perf_counter()
+        sources = await asyncio.to_thread(self.store.sources_many, hits)
+        for i, ctx, found in zip(pending, todo, sources):
+            ctx.record("hydrate_ms", started)
+            results[i] = found
+            if keys[i][-1] == self.generation.value:
+                self.results_cache.put(keys[i], found)
+        return results
+
+    def cache_stats(self) -> dict:
+        return {
+            "generation": self.generation.value,
+            "results": self.results_cache.stats(),
+            "query_vectors": self.vector_cache.stats(),
+            "answers": self.answer_cache.stats(),
+            "bm25_chunks": len(self.bm25),
+        }
 
+    async def semantic_search(
+        self, query: str, top_k: int | None = None, mode: str = "dense", filters: SearchFilters | None = None
+    ) -> list[SourceItem]:
+        return await self.retrieve(self.context(query, top_k, mode, filters))
+
+    async def semantic_search_batch(self, requests: list[QueryRequest]) -> list[list[SourceItem]]:
+        return await self.retrieve_batch([self.context(r.query, r.top_k, r.mode, r.filters) for r in requests])
+
+    async def _prepare(self, ctx: QueryContext) -> tuple[str, float, list[SourceItem], str]:
+        await self.embed_query(ctx)
+        (label, cls_conf, _), sources = await asyncio.gather(self.route(ctx), self.retrieve(ctx))
+        started = time.perf_counter()
+        prompt, sources = await asyncio.to_thread(self._pack_prompt, ctx, label, sources)
+        ctx.record("pack_ms", started)
+        return label, cls_conf, sources, prompt
+
+    @staticmethod
+    def _prompt_prefix(label: str) -> str:
         system = PROMPT_TEMPLATES.get(label, PROMPT_TEMPLATES["general"])
-        prompt = (
+        return (
             f"{system}\n\n"
             "Rules:\n"
             "1) Use only provided context.\n"
             "2) Cite source indices like [source:2].\n"
             "3) Keep answer factual and concise.\n\n"
-            f"Question:\n{query}\n\n"
-            f"Context:\n{context_block}\n\n"
-            "Answer:"
         )
 
-        raw_answer = self.llm.generate(prompt)
+    def prompt_prefixes(self) -> list[str]:
+        return [self._prompt_prefix(label) for label in PROMPT_TEMPLATES] + [SUMMARY_PREFIX]
+
+    def _build_prompt(self, label: str, query: str, context_block: str) -> str:
+        return f"{self._prompt_prefix(label)}Question:\n{query}\n\nContext:\n{context_block}\n\nAnswer:"
+
+    def _pack_prompt(self, ctx: QueryContext, label: str, sources: list[SourceItem]) -> tuple[str, list[SourceItem]]:
+        texts = self.store.chunk_texts([s.point_id for s in sources if s.point_id])
+        budget = self.llm.prompt_budget - self.llm.count_tokens(self._build_prompt(label, ctx.query, ""))
+        packed = self.packer.pack(sources, texts, budget)
+        prompt = self._build_prompt(label, ctx.query, packed.text)
+        ctx.prompt_tokens = self.llm.count_tokens(prompt)
+        ctx.answer_key = (
+            label,
+            tuple(s.point_id for s in packed.sources),
+            hashlib.sha1(packed.text.encode("utf-8")).hexdigest(),
+        )
+        return prompt, packed.sources
+
+    @staticmethod
+    def _confidence(sources: list[SourceItem], cls_conf: float) -> float:
         avg_score = mean([s.score for s in sources]) if sources else 0.0
-        confidence = max(0.0, min(1.0, 0.65 * avg_score + 0.35 * cls_conf))
+        return max(0.0, min(1.0, 0.65 * avg_score + 0.35 * cls_conf))
 
-        return QueryResponse(
-            answer=raw_answer,
+    async def answer(
+        self, query: str, top_k: int | None = None, mode: str = "dense", filters: SearchFilters | None = None
+    ) -> QueryResponse:
+        ctx = self.context(query, top_k, mode, filters)
+        label, cls_conf, sources, prompt = await self._prepare(ctx)
+        response = QueryResponse(
+            answer="",
             sources=sources,
-            confidence=confidence,
+            confidence=self._confidence(sources, cls_conf),
             route=label,
+            prompt_tokens=ctx.prompt_tokens,
+            timings=ctx.timings,
         )
 
-    def summarize(self, text: str) -> str:
-        prompt = (
-            "You summarize technical markdown notes for a knowledge worker.\n"
-            "Return: 3-6 bullets and one short conclusion.\n\n"
-            f"Text:\n{text}\n\nSummary:"
+        cached = self.answer_cache.get(ctx.vector, ctx.answer_key)
+        if cached is not None:
+            ctx.record("total_ms", ctx.started)
+            return response.model_copy(update={"answer": cached.answer, "cached": True})
+
+        started = time.perf_counter()
+        response.answer = await self.scheduler.generate(prompt, self._prompt_prefix(label))
+        ctx.record("generate_ms", started)
+        ctx.record("total_ms", ctx.started)
+        self._remember(ctx, response)
+        return response
+
+    def _remember(self, ctx: QueryContext, response: QueryResponse) -> None:
+        if response.answer and ctx.generation == self.generation.value:
+            self.answer_cache.put(ctx.vector, ctx.answer_key, list(ctx.answer_key[1]), response)
+
+    async def answer_stream(
+        self, query: str, top_k: int | None = None, mode: str = "dense", filters: SearchFilters | None = None
+    ) -> AsyncIterator[tuple[str, dict]]:
+        ctx = self.context(query, top_k, mode, filters)
+        label, cls_conf, sources, prompt = await self._prepare(ctx)
+        confidence = self._confidence(sources, cls_conf)
+        cached = self.answer_cache.get(ctx.vector, ctx.answer_key)
+        if cached is None:
+            self.scheduler.ensure_capacity()
+        yield "sources", {
+            "sources": [s.model_dump() for s in sources],
+            "confidence": confidence,
+            "route": label,
+            "prompt_tokens": ctx.prompt_tokens,
+            "cached": cached is not None,
+            "timings": dict(ctx.timings),
+        }
+        if cached is not None:
+            ctx.record("total_ms", ctx.started)
+            yield "token", {"text": cached.answer}
+            yield "done", {"answer": cached.answer, "cached": True, "timings": ctx.timings}
+            return
+
+        started = time.perf_counter()
+        parts: list[str] = []
+        async with self.scheduler.slot():
+            tokens = await asyncio.to_thread(self.llm.stream, prompt, self._prompt_prefix(label))
+            try:
+                while (text := await asyncio.to_thread(next, tokens, None)) is not None:
+                    if not parts:
+                        ctx.record("ttft_ms", ctx.started)
+                    parts.append(text)
+                    yield "token", {"text": text}
+            finally:
+                tokens.close()
+        ctx.record("generate_ms", started)
+        ctx.record("total_ms", ctx.started)
+        answer = "".join(parts).strip()
+        self._remember(
+            ctx,
+            QueryResponse(
+                answer=answer,
+                sources=sources,
+                confidence=confidence,
+                route=label,
+                prompt_tokens=ctx.prompt_tokens,
+                timings=ctx.timings,
+            ),
         )
-        return self.llm.generate(prompt)
+        yield "done", {"answer": answer, "cached": False, "timings": ctx.timings}
+
+    async def summarize(self, text: str) -> str:
+        prompt = f"{SUMMARY_PREFIX}Text:\n{text}\n\nSummary:"
+        return await self.scheduler.generate(prompt, SUMMARY_PREFIX)
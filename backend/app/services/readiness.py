@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from app.models.schemas import ComponentStatus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Component:
+    status: str = "pending"
+    seconds: float | None = None
+    error: str | None = None
+
+
+class Readiness:
+    def __init__(self, components: list[str], retry_delay: float = 1.0, max_retry_delay: float = 30.0):
+        self.components = {name: _Component() for name in components}
+        self.started = time.perf_counter()
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+    def record(self, name: str, seconds: float) -> None:
+        self.components[name] = _Component(status="ready", seconds=round(seconds, 3))
+
+    async def run(self, name: str, fn: Callable, *args, retry: bool = False) -> bool:
+        component = self.components.setdefault(name, _Component())
+        component.status = "loading"
+        started = time.perf_counter()
+        delay = self.retry_delay
+        while True:
+            try:
+                if asyncio.iscoroutinefunction(fn):
+                    await fn(*args)
+                else:
+                    await asyncio.to_thread(fn, *args)
+                break
+            except Exception as exc:
+                component.error = str(exc)
+                component.seconds = round(time.perf_counter() - started, 3)
+                if not retry:
+                    logger.exception("Startup step %s failed", name)
+                    component.status = "failed"
+                    return False
+                logger.warning("Startup step %s failed, retrying in %.1fs: %s", name, delay, exc)
+                component.status = "retrying"
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+        component.seconds = round(time.perf_counter() - started, 3)
+        component.status = "ready"
+        component.error = None
+        return True
+
+    @property
+    def ready(self) -> bool:
+        return all(c.status == "ready" for c in self.components.values())
+
+    def snapshot(self) -> dict[str, ComponentStatus]:
+        return {
+            name: ComponentStatus(status=c.status, seconds=c.seconds, error=c.error)
+            for name, c in self.components.items()
+        }
+
+    def log_summary(self) -> None:
+        parts = " ".join(f"{name}={c.seconds or 0:.2f}s({c.status})" for name, c in self.components.items())
+        logger.info("Startup timings: total=%.2fs %s", time.perf_counter() - self.started, parts)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.services.chunker import Chunk, SectionAwareChunker
+from app.services.link_graph import note_aliases
+from app.services.manifest import hash_bytes
+from app.services.parser import MarkdownParser
+
+_parser: MarkdownParser | None = None
+_chunker: SectionAwareChunker | None = None
+
+
+@dataclass
+class ChunkedFile:
+    content_hash: str
+    title: str
+    tags: list[str]
+    frontmatter: dict
+    links: list[str]
+    chunks: list[tuple[str, str, str | None, int, int]]
+
+    def to_chunks(self) -> list[Chunk]:
+        return [Chunk(*c) for c in self.chunks]
+
+
+def _init_worker(chunk_size: int, chunk_overlap: int) -> None:
+    global _parser, _chunker
+    _parser = MarkdownParser()
+    _chunker = SectionAwareChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def chunk_file(path: Path, known_hash: str | None) -> ChunkedFile | None:
+    data = path.read_bytes()
+    content_hash = hash_bytes(data)
+    if content_hash == known_hash:
+        return None
+    parsed = _parser.parse_text(path, data.decode("utf-8"))
+    return ChunkedFile(
+        content_hash=content_hash,
+        title=parsed.title,
+        tags=parsed.tags,
+        frontmatter=parsed.frontmatter,
+        links=parsed.links,
+        chunks=[(c.chunk_id, c.text, c.heading, c.line_start, c.line_end) for c in _chunker.chunk_document(parsed)],
+    )
+
+
+def parse_links(path: Path) -> tuple[Path, str, list[str], list[str]]:
+    parsed = _parser.parse(path)
+    return path, parsed.title, parsed.links, note_aliases(parsed.frontmatter)
+
+
+class ParsePool:
+    def __init__(self, chunk_size: int, chunk_overlap: int, workers: int = 0):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self._executor: Executor | None = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            args = (self.chunk_size, self.chunk_overlap)
+            if self.workers > 1:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=args,
+                )
+            else:
+                _init_worker(*args)
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="parse")
+        return self._executor
+
+    async def chunk_file(self, path: Path, known_hash: str | None) -> ChunkedFile | None:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, chunk_file, path, known_hash)
+
+    def parse_links(self, paths: list[Path]) -> list[tuple[Path, str, list[str], list[str]]]:
+        chunksize = max(len(paths) // (self.workers * 4), 1)
+        return list(self.executor.map(parse_links, paths, chunksize=chunksize))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import torch  # noqa: E402
+
+from app.services.classifier import PROMPT_TEMPLATES  # noqa: E402
+from app.services.llm_service import LocalLLMService  # noqa: E402
+from app.services.rag import SUMMARY_PREFIX, RAGService  # noqa: E402
+
+SAMPLE_SUFFIX = (
+    "Question:\nWhat is left to do for the release?\n\n"
+    "Context:\n[source:1] file=projects/release.md heading=Checklist\n"
+    "- [ ] Update the changelog\n- [ ] Tag v1.4 and publish the plugin\n\n"
+    "Answer:"
+)
+
+
+def prefill_ms(llm: LocalLLMService, prompt: str, prefix: str | None, runs: int) -> float:
+    timings = []
+    for _ in range(runs + 1):
+        inputs = llm._inputs(prompt, prefix)
+        past = inputs.get("past_key_values")
+        input_ids = inputs["input_ids"]
+        started = time.perf_counter()
+        with torch.no_grad():
+            if past is None:
+                llm.generator.model(input_ids=input_ids, use_cache=True)
+            else:
+                cached = past.get_seq_length() if hasattr(past, "get_seq_length") else past[0][0].shape[2]
+                llm.generator.model(input_ids=input_ids[:, cached:], past_key_values=past, use_cache=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings[1:])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure prefill time saved by the per-route prompt prefix cache")
+    parser.add_argument("--model", default="distilgpt2")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    llm = LocalLLMService(args.model, max_new_tokens=1)
+    prefixes = {label: RAGService._prompt_prefix(label) for label in PROMPT_TEMPLATES}
+    prefixes["summarize"] = SUMMARY_PREFIX
+    llm.warm_prefixes(list(prefixes.values()))
+
+    print(f"{'route':<12}{'prefix tok':>11}{'prompt tok':>11}{'full ms':>10}{'cached ms':>11}{'saved ms':>10}")
+    for route, prefix in prefixes.items():
+        prompt = prefix + SAMPLE_SUFFIX
+        full = prefill_ms(llm, prompt, None, args.runs)
+        cached = prefill_ms(llm, prompt, prefix, args.runs)
+        print(
+            f"{route:<12}{llm.count_tokens(prefix):>11}{llm.count_tokens(prompt):>11}"
+            f"{full:>10.2f}{cached:>11.2f}{full - cached:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
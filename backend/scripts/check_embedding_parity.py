@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.embeddings import cosine_parity, load_sentence_transformer  # noqa: E402
+
+SAMPLE_TEXTS = [
+    "Quarterly roadmap: ship the sync engine and migrate billing.",
+    "TODO: renew the TLS certificates before Friday.",
+    "Meeting notes with the research team about retrieval evaluation.",
+    "def build_graph(vault_path): return parse_links(vault_path)",
+    "The study compares dense and sparse retrieval on long documents.",
+]
+
+
+def load_texts(vault: Path | None, limit: int) -> list[str]:
+    if vault is None:
+        return SAMPLE_TEXTS
+    texts = []
+    for md in sorted(vault.rglob("*.md"))[:limit]:
+        body = md.read_text(encoding="utf-8", errors="ignore").strip()
+        if body:
+            texts.append(body[:2000])
+    return texts or SAMPLE_TEXTS
+
+
+def encode(model, texts: list[str]) -> tuple[np.ndarray, float]:
+    model.encode(texts[:1])
+    started = time.perf_counter()
+    vectors = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    return vectors, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare an ONNX embedding backend against the torch reference")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--backend", default="onnx")
+    parser.add_argument("--quantize", default="", help="avx2, avx512, avx512_vnni or arm64 for int8")
+    parser.add_argument("--export-dir", default="backend/data/onnx")
+    parser.add_argument("--vault-path", default=None)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    texts = load_texts(Path(args.vault_path) if args.vault_path else None, args.limit)
+    reference, ref_sec = encode(load_sentence_transformer(args.model), texts)
+    candidate_model = load_sentence_transformer(args.model, args.backend, args.quantize, Path(args.export_dir))
+    candidate, cand_sec = encode(candidate_model, texts)
+
+    cos = cosine_parity(reference, candidate)
+    print(f"texts={len(texts)} torch={ref_sec:.3f}s {args.backend}{'-' + args.quantize if args.quantize else ''}={cand_sec:.3f}s")
+    print(f"cosine min={cos.min():.5f} mean={cos.mean():.5f}")
+    if cos.min() < args.min_cosine:
+        print(f"FAIL: min cosine below {args.min_cosine}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
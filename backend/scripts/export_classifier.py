@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.classifier_runtime import from_keras  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export a trained Keras query classifier to NumPy weights")
+    parser.add_argument("--model", default="backend/models/doc_classifier.keras")
+    parser.add_argument("--output", default=None, help="defaults to the model path with a .npz suffix")
+    parser.add_argument("--samples", type=int, default=256, help="random inputs used for the parity check")
+    parser.add_argument(
+        "--if-stale",
+        action="store_true",
+        help="do nothing when the model is missing or the output is already newer than it",
+    )
+    args = parser.parse_args()
+
+    model_path = Path(args.model)
+    out = Path(args.output) if args.output else model_path.with_suffix(".npz")
+    if args.if_stale:
+        if not model_path.exists():
+            print(f"no model at {model_path}; nothing to export")
+            return
+        if out.exists() and out.stat().st_mtime >= model_path.stat().st_mtime:
+            print(f"{out} is up to date")
+            return
+
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path)
+    runtime = from_keras(model)
+    runtime.save(out)
+
+    x = np.random.rand(args.samples, runtime.input_dim).astype(np.float32)
+    expected = model.predict(x, verbose=0)
+    actual = runtime.predict(x)
+    max_diff = float(np.abs(expected - actual).max())
+    agreement = float((expected.argmax(axis=1) == actual.argmax(axis=1)).mean())
+    print(f"saved {out} ({out.stat().st_size} bytes)")
+    print(f"parity: max abs diff={max_diff:.2e} argmax agreement={agreement:.4f}")
+    if agreement < 1.0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import get_settings  # noqa: E402
+from app.services.qdrant_service import QdrantService  # noqa: E402
+
+
+async def sample_vectors(qdrant: QdrantService, count: int) -> list[list[float]]:
+    records, _ = await qdrant.client.scroll(
+        collection_name=qdrant.collection_name, limit=count, with_payload=False, with_vectors=True
+    )
+    return [record.vector for record in records]
+
+
+async def run(qdrant: QdrantService, queries: list[list[float]], top_k: int, **params) -> tuple[list[list[str]], list[float]]:
+    results, latencies = [], []
+    search_params = qdrant.search_params(**params)
+    for vector in queries:
+        started = time.perf_counter()
+        hits = await qdrant.search(vector, top_k, params=search_params)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([pid for pid, _ in hits])
+    return results, latencies
+
+
+async def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Report recall and latency of Qdrant search settings against exact search")
+    parser.add_argument("--url", default=settings.qdrant_url)
+    parser.add_argument("--collection", default=settings.qdrant_collection)
+    parser.add_argument("--queries", type=int, default=200, help="number of stored vectors to use as queries")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--ef", default="16,32,64,128,256", help="comma separated search-time ef values")
+    args = parser.parse_args()
+
+    qdrant = QdrantService(
+        args.url,
+        args.collection,
+        quantization=settings.qdrant_quantization,
+        rescore=settings.qdrant_rescore,
+        oversampling=settings.qdrant_oversampling,
+    )
+    try:
+        info = await qdrant.client.get_collection(args.collection)
+        print(f"collection={args.collection} points={info.points_count}")
+        print(f"hnsw={info.config.hnsw_config} quantization={info.config.quantization_config}")
+
+        queries = await sample_vectors(qdrant, args.queries)
+        if not queries:
+            print("Collection is empty")
+            return
+        truth, exact_ms = await run(qdrant, queries, args.top_k, exact=True)
+        print(f"{'config':<28}{'recall@' + str(args.top_k):>12}{'p50 ms':>10}{'p95 ms':>10}")
+        print(f"{'exact':<28}{1.0:>12.4f}{np.percentile(exact_ms, 50):>10.2f}{np.percentile(exact_ms, 95):>10.2f}")
+
+        rescore_options = [True, False] if qdrant.quantization else [None]
+        for ef in [int(x) for x in args.ef.split(",") if x.strip()]:
+            for rescore in rescore_options:
+                found, latencies = await run(qdrant, queries, args.top_k, ef=ef, rescore=rescore)
+                recall = np.mean([len(set(f) & set(t)) / max(len(t), 1) for f, t in zip(found, truth)])
+                label = f"ef={ef}" + ("" if rescore is None else f" rescore={rescore}")
+                print(
+                    f"{label:<28}{recall:>12.4f}"
+                    f"{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 95):>10.2f}"
+                )
+    finally:
+        await qdrant.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
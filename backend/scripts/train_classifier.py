@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
 import numpy as np
 import tensorflow as tf
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.classifier_runtime import from_keras  # noqa: E402
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Train a tiny query classifier on embedding vectors")
@@ -34,6 +39,9 @@ def main() -> None:
     out.parent.mkdir(parents=True, exist_ok=True)
     model.save(out)
     print(f"saved {out}")
+    weights = out.with_suffix(".npz")
+    from_keras(model).save(weights)
+    print(f"saved {weights}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,28 @@
+from app.models.schemas import QueryResponse
+from app.services.answer_cache import SemanticAnswerCache
+
+
+def _response(answer: str) -> QueryResponse:
+    return QueryResponse(answer=answer, sources=[], confidence=0.5, route="task")
+
+
+def test_answer_cache_matches_similar_queries_with_same_sources():
+    cache = SemanticAnswerCache(max_entries=8, threshold=0.95)
+    key = ("task", ("p1", "p2"), "digest")
+    cache.put([1.0, 0.0, 0.1], key, ["p1", "p2"], _response("todo"))
+
+    assert cache.get([1.0, 0.0, 0.12], key).answer == "todo"
+    assert cache.get([0.0, 1.0, 0.0], key) is None
+    assert cache.get([1.0, 0.0, 0.1], ("general", ("p1", "p2"), "digest")) is None
+    assert cache.get([1.0, 0.0, 0.1], ("task", ("p1", "p2"), "changed")) is None
+
+
+def test_answer_cache_invalidates_entries_citing_reindexed_chunks():
+    cache = SemanticAnswerCache(max_entries=8)
+    cache.put([1.0, 0.0], ("task", ("p1",), "a"), ["p1"], _response("one"))
+    cache.put([1.0, 0.0], ("task", ("p2",), "b"), ["p2"], _response("two"))
+
+    assert cache.invalidate(["p1"]) == 1
+    assert cache.get([1.0, 0.0], ("task", ("p1",), "a")) is None
+    assert cache.get([1.0, 0.0], ("task", ("p2",), "b")).answer == "two"
+    assert cache.stats()["entries"] == 1
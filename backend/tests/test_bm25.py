@@ -0,0 +1,53 @@
+import numpy as np
+
+from app.services.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def test_bm25_ranks_exact_terms_and_updates_incrementally(tmp_path):
+    index = BM25Index(tmp_path / "bm25.npz")
+    index.add("a.md", [("p1", "Fix OPS-1234 in build_graph"), ("p2", "General notes about graphs")])
+    index.add("b.md", [("p3", "Tagged #project notes")])
+
+    assert [pid for pid, _ in index.search("OPS-1234", 5)] == ["p1"]
+    assert [pid for pid, _ in index.search("#project", 5)] == ["p3"]
+
+    index.remove_points(["p1"])
+    assert index.search("build_graph", 5) == []
+
+    index.save()
+    reloaded = BM25Index(tmp_path / "bm25.npz")
+    assert len(reloaded) == 2
+    assert sorted(pid for pid, _ in reloaded.search("notes", 5)) == ["p2", "p3"]
+    reloaded.remove_file("b.md")
+    assert reloaded.search("#project", 5) == []
+
+
+def test_tokenize_keeps_identifiers_and_tags():
+    assert tokenize("See #todo, build_graph() and v1.2.") == ["see", "#todo", "build_graph", "and", "v1.2"]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]])
+    assert fused[0][0] == "b"
+
+
+def test_bm25_saves_without_pickled_arrays_and_compacts_only_when_needed(tmp_path, monkeypatch):
+    path = tmp_path / "bm25.npz"
+    index = BM25Index(path)
+    index.add("dir/ünïcode.md", [("p1", "alpha beta"), ("p2", "beta gamma")])
+    compactions = []
+    monkeypatch.setattr(index, "_compact", lambda: compactions.append(1))
+    index.save()
+    assert compactions == []
+
+    with np.load(path, allow_pickle=False) as data:
+        assert all(data[name].dtype != object for name in data.files)
+    reloaded = BM25Index(path)
+    assert reloaded.doc_files == ["dir/ünïcode.md", "dir/ünïcode.md"]
+    assert [pid for pid, _ in reloaded.search("gamma", 5)] == ["p2"]
+
+    empty = BM25Index(tmp_path / "empty.npz")
+    empty.add("a.md", [])
+    empty._dirty = True
+    empty.save()
+    assert len(BM25Index(tmp_path / "empty.npz")) == 0
@@ -1,7 +1,9 @@
+import asyncio
 from pathlib import Path
 
 from app.services.chunker import SectionAwareChunker
 from app.services.parser import MarkdownParser
+from app.services.workers import ParsePool
 
 
 def test_parser_extracts_frontmatter_tags_headings_links(tmp_path: Path):
@@ -32,3 +34,32 @@ def test_chunker_splits_section_aware(tmp_path: Path):
     assert len(chunks) > 2
     headings = {c.heading for c in chunks}
     assert "A" in headings and "B" in headings
+
+
+def test_chunk_ids_are_content_addressed(tmp_path: Path):
+    md = tmp_path / "doc.md"
+    chunker = SectionAwareChunker(chunk_size=300, chunk_overlap=50)
+
+    md.write_text("# A\nalpha\n# B\nbeta\n# C\nbeta\n", encoding="utf-8")
+    before = chunker.chunk_document(MarkdownParser().parse(md))
+    md.write_text("# Intro\nnew paragraph\n# A\nalpha\n# B\nbeta\n# C\nbeta\n", encoding="utf-8")
+    after = chunker.chunk_document(MarkdownParser().parse(md))
+
+    assert len({c.chunk_id for c in before}) == len(before)
+    assert {c.chunk_id for c in before} < {c.chunk_id for c in after}
+    moved = next(c for c in after if c.heading == "A")
+    assert moved.line_start > next(c for c in before if c.heading == "A").line_start
+
+
+def test_parse_pool_skips_known_content(tmp_path: Path):
+    md = tmp_path / "doc.md"
+    md.write_text("---\ntitle: Doc\n---\n# A\nalpha [[B]]\n", encoding="utf-8")
+    pool = ParsePool(chunk_size=300, chunk_overlap=50, workers=1)
+
+    chunked = asyncio.run(pool.chunk_file(md, None))
+    unchanged = asyncio.run(pool.chunk_file(md, chunked.content_hash))
+    pool.shutdown()
+
+    assert chunked.title == "Doc" and chunked.links == ["B"]
+    assert [c.heading for c in chunked.to_chunks()] == ["A"]
+    assert unchanged is None
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import numpy as np
+
+from app.services.classifier import QueryRouterClassifier
+from app.services.classifier_runtime import NumpyClassifier
+
+
+def _model() -> NumpyClassifier:
+    rng = np.random.default_rng(0)
+    return NumpyClassifier(
+        [
+            (rng.normal(size=(4, 8)).astype(np.float32), rng.normal(size=8).astype(np.float32), "relu"),
+            (rng.normal(size=(8, 3)).astype(np.float32), rng.normal(size=3).astype(np.float32), "softmax"),
+        ]
+    )
+
+
+def test_numpy_classifier_round_trips_and_matches_reference(tmp_path: Path):
+    model = _model()
+    path = tmp_path / "router.npz"
+    model.save(path)
+    loaded = NumpyClassifier.load(path)
+
+    x = np.random.default_rng(1).normal(size=(5, 4)).astype(np.float32)
+    (w0, b0, _), (w1, b1, _) = model.layers
+    logits = np.maximum(x @ w0 + b0, 0) @ w1 + b1
+    expected = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+
+    np.testing.assert_allclose(loaded.predict(x), expected, rtol=1e-5, atol=1e-6)
+
+
+def test_router_prefers_npz_weights_and_classifies_batches(tmp_path: Path):
+    model = _model()
+    model.save(tmp_path / "router.npz")
+    router = QueryRouterClassifier(tmp_path / "router.keras", ["general", "task", "note"], embedding_service=None)
+
+    vectors = np.random.default_rng(2).normal(size=(3, 4)).tolist()
+    results = router.classify_batch(["a", "b", "c"], vectors)
+
+    assert router.runtime == "numpy"
+    assert [r[0] for r in results] == [router.classify("a", v)[0] for v in vectors]
+    assert all(abs(sum(r[2].values()) - 1.0) < 1e-5 for r in results)
@@ -0,0 +1,39 @@
+from app.models.schemas import SourceItem
+from app.services.context_packer import ContextPacker
+
+
+def _count(text: str) -> int:
+    return len(text.split())
+
+
+def _source(pid: str, score: float, file_path: str = "a.md", lines: tuple[int, int] = (1, 2)) -> SourceItem:
+    return SourceItem(
+        file_path=file_path, score=score, snippet="", line_start=lines[0], line_end=lines[1], point_id=pid
+    )
+
+
+def test_packer_orders_by_score_and_drops_overlaps():
+    sources = [
+        _source("low", 0.2, "b.md"),
+        _source("high", 0.9, "a.md", (1, 10)),
+        _source("inside", 0.8, "a.md", (3, 5)),
+        _source("dupe", 0.7, "c.md"),
+    ]
+    texts = {"low": "Low note.", "high": "High note.", "inside": "Inner part.", "dupe": "High   note."}
+
+    packed = ContextPacker(_count, min_block_tokens=1).pack(sources, texts, budget=100)
+
+    assert [s.point_id for s in packed.sources] == ["high", "low"]
+    assert packed.text.startswith("[source:1] file=a.md")
+    assert "[source:2] file=b.md" in packed.text
+    assert packed.dropped == 2
+
+
+def test_packer_trims_last_source_at_sentence_boundary():
+    sources = [_source("a", 0.9, "a.md"), _source("b", 0.5, "b.md")]
+    texts = {"a": "one two three.", "b": "First sentence here. Second sentence that will not fit at all."}
+
+    packed = ContextPacker(_count, min_block_tokens=1).pack(sources, texts, budget=14)
+
+    assert packed.text.endswith("First sentence here.")
+    assert packed.tokens <= 14
@@ -0,0 +1,25 @@
+from app.services.chunker import Chunk
+from app.services.docstore import DocumentStore
+from app.services.qdrant_service import point_id
+
+
+def _chunk(chunk_id: str, text: str, line_start: int = 1) -> Chunk:
+    return Chunk(chunk_id=chunk_id, heading="H", text=text, line_start=line_start, line_end=line_start + 1)
+
+
+def test_document_store_hydrates_sources_in_hit_order(tmp_path):
+    store = DocumentStore(tmp_path / "docs.sqlite3")
+    a, b = _chunk("a.md::1", "alpha " * 100), _chunk("a.md::2", "beta")
+    store.write_file("a.md", {"title": "A", "tags": ["x"]}, [a, b], [], [])
+
+    sources = store.sources([(point_id(b.chunk_id), 0.9), ("missing", 0.5), (point_id(a.chunk_id), 0.4)])
+    assert [(s.snippet[:4], s.score, s.title) for s in sources] == [("beta", 0.9, "A"), ("alph", 0.4, "A")]
+    assert len(sources[1].snippet) == 300
+
+    store.write_file("a.md", {"title": "A"}, [], [point_id(a.chunk_id)], [(point_id(b.chunk_id), 7, 9)])
+    [moved] = store.sources([(point_id(b.chunk_id), 1.0)])
+    assert (moved.line_start, moved.line_end) == (7, 9)
+    assert len(store) == 1
+
+    store.delete_file("a.md")
+    assert len(store) == 0
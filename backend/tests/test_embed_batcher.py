@@ -0,0 +1,41 @@
+import asyncio
+
+from app.services.embed_batcher import EmbeddingBatcher
+
+
+class _CountingEmbedder:
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def embed(self, texts: list[str], cache: bool = True) -> list[list[float]]:
+        assert not cache
+        self.calls.append(texts)
+        return [[float(len(t))] for t in texts]
+
+
+def test_batcher_groups_concurrent_requests():
+    embedder = _CountingEmbedder()
+
+    async def run():
+        batcher = EmbeddingBatcher(embedder, max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.embed_one("x" * n) for n in range(1, 6)))
+        await batcher.close()
+        return results
+
+    results = asyncio.run(run())
+
+    assert results == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert len(embedder.calls) == 1
+
+
+def test_embed_many_uses_one_encode_call():
+    embedder = _CountingEmbedder()
+
+    async def run():
+        batcher = EmbeddingBatcher(embedder)
+        results = await batcher.embed_many(["a", "bb", "ccc"])
+        await batcher.close()
+        return results
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [3.0]]
+    assert embedder.calls == [["a", "bb", "ccc"]]
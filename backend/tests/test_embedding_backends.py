@@ -0,0 +1,95 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embeddings import backend_key, load_sentence_transformer
+from app.services.manifest import FileRecord, IndexManifest
+
+
+@pytest.fixture
+def fake_st(monkeypatch):
+    calls = []
+
+    class SentenceTransformer:
+        def __init__(self, name, backend="torch", model_kwargs=None):
+            self.name = name
+            calls.append(("load", name, backend, (model_kwargs or {}).get("file_name")))
+
+        def save(self, path):
+            calls.append(("export", self.name))
+            (Path(path) / "onnx").mkdir(parents=True, exist_ok=True)
+            (Path(path) / "onnx" / "model.onnx").write_bytes(b"onnx")
+
+    def export_dynamic_quantized_onnx_model(model, quantize, path):
+        calls.append(("quantize", quantize))
+        (Path(path) / "onnx" / f"model_qint8_{quantize}.onnx").write_bytes(b"int8")
+
+    module = SimpleNamespace(
+        SentenceTransformer=SentenceTransformer,
+        export_dynamic_quantized_onnx_model=export_dynamic_quantized_onnx_model,
+    )
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+    return calls
+
+
+def test_backend_key_distinguishes_backends_and_quantization():
+    keys = {
+        backend_key("org/model"),
+        backend_key("org/model", "onnx"),
+        backend_key("org/model", "onnx", "avx2"),
+        backend_key("org/model", "onnx", "avx512_vnni"),
+    }
+    assert backend_key("org/model") == "org/model"
+    assert backend_key("org/model", "onnx", "avx2") == "org/model@onnx-qint8-avx2"
+    assert len(keys) == 4
+
+
+def test_torch_backend_loads_the_hub_model(fake_st, tmp_path: Path):
+    load_sentence_transformer("org/model", export_dir=tmp_path)
+    assert fake_st == [("load", "org/model", "torch", None)]
+
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        load_sentence_transformer("org/model", "tensorrt", export_dir=tmp_path)
+
+
+def test_onnx_backend_exports_once_and_reuses_the_local_copy(fake_st, tmp_path: Path):
+    local = str(tmp_path / "org_model")
+
+    load_sentence_transformer("org/model", "onnx", export_dir=tmp_path)
+    assert fake_st == [("load", "org/model", "onnx", None), ("export", "org/model"), ("load", local, "onnx", None)]
+
+    fake_st.clear()
+    load_sentence_transformer("org/model", "onnx", export_dir=tmp_path)
+    assert fake_st == [("load", local, "onnx", None)]
+
+
+def test_quantized_onnx_backend_loads_the_int8_file(fake_st, tmp_path: Path):
+    local = str(tmp_path / "org_model")
+    load_sentence_transformer("org/model", "onnx", "avx2", export_dir=tmp_path)
+
+    assert ("quantize", "avx2") in fake_st
+    assert fake_st[-1] == ("load", local, "onnx", "onnx/model_qint8_avx2.onnx")
+
+    fake_st.clear()
+    load_sentence_transformer("org/model", "onnx", "avx2", export_dir=tmp_path)
+    assert fake_st == [("load", local, "onnx", "onnx/model_qint8_avx2.onnx")]
+
+
+def test_switching_backend_invalidates_cached_vectors_and_manifest(tmp_path: Path):
+    torch_key = backend_key("org/model")
+    onnx_key = backend_key("org/model", "onnx", "avx2")
+
+    EmbeddingCache(tmp_path / "cache", torch_key, dimension=4, max_entries=8).store(["a"], np.ones((1, 4)))
+    _, missing = EmbeddingCache(tmp_path / "cache", onnx_key, dimension=4, max_entries=8).lookup(["a"])
+    assert missing == [0]
+
+    manifest = IndexManifest(tmp_path / "manifest.json", "docs", torch_key)
+    manifest.update("a.md", FileRecord(mtime=1.0, size=1, content_hash="h"))
+    manifest.save()
+    switched = IndexManifest(tmp_path / "manifest.json", "docs", onnx_key)
+    assert switched.stale
+    assert len(switched) == 0
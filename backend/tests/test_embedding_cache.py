@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embeddings import EmbeddingService
+
+
+def test_embedding_cache_persists_and_evicts_lru(tmp_path: Path):
+    cache = EmbeddingCache(tmp_path, "model-a", dimension=4, max_entries=2)
+    cache.store(["a", "b"], np.eye(4, dtype=np.float32)[:2])
+    cache.lookup(["a"])
+    cache.store(["c"], np.eye(4, dtype=np.float32)[2:3])
+    cache.flush()
+
+    reopened = EmbeddingCache(tmp_path, "model-a", dimension=4, max_entries=2)
+    vectors, missing = reopened.lookup(["a", "b", "c"])
+
+    assert missing == [1]
+    assert vectors[0].tolist() == [1.0, 0.0, 0.0, 0.0]
+    assert vectors[2].tolist() == [0.0, 0.0, 1.0, 0.0]
+    assert reopened.stats()["hits"] == 2
+
+
+def test_embedding_cache_is_keyed_by_model(tmp_path: Path):
+    EmbeddingCache(tmp_path, "model-a", dimension=4, max_entries=8).store(["a"], np.ones((1, 4)))
+
+    _, missing = EmbeddingCache(tmp_path, "model-b", dimension=4, max_entries=8).lookup(["a"])
+
+    assert missing == [0]
+
+
+def test_uncached_embeddings_do_not_touch_the_chunk_cache(tmp_path: Path):
+    class _Model:
+        def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+            return np.ones((len(texts), 4), dtype=np.float32)
+
+    service = EmbeddingService("model-a")
+    service._model = _Model()
+    service.cache = EmbeddingCache(tmp_path, "model-a", dimension=4, max_entries=8)
+
+    service.embed_one("what did I write about tides?")
+    service.embed(["a query"], cache=False)
+    assert service.cache.stats()["entries"] == 0
+
+    service.embed(["chunk text"])
+    assert service.cache.stats()["entries"] == 1
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.generation import GenerationRejected, GenerationScheduler
+
+
+class _FakeLLM:
+    def __init__(self):
+        self.batches: list[list[str]] = []
+        self.release = threading.Event()
+
+    def generate_batch(self, prompts: list[str], prefixes: list[str | None]) -> list[str]:
+        self.release.wait(5)
+        self.batches.append(prompts)
+        return [p.upper() for p in prompts]
+
+
+def test_scheduler_batches_waiting_requests_and_rejects_overflow():
+    llm = _FakeLLM()
+
+    async def run():
+        scheduler = GenerationScheduler(llm, max_concurrency=1, max_queue=3, max_batch_size=4, max_wait_ms=5)
+        first = asyncio.create_task(scheduler.generate("a"))
+        await asyncio.sleep(0.05)
+        waiting = [asyncio.create_task(scheduler.generate(p)) for p in "bcd"]
+        await asyncio.sleep(0)
+        with pytest.raises(GenerationRejected) as rejected:
+            await scheduler.generate("e")
+        llm.release.set()
+        results = await asyncio.gather(first, *waiting)
+        stats = scheduler.stats()
+        await scheduler.close()
+        return results, rejected.value, stats
+
+    results, rejected, stats = asyncio.run(run())
+
+    assert results == ["A", "B", "C", "D"]
+    assert llm.batches == [["a"], ["b", "c", "d"]]
+    assert rejected.status_code == 429
+    assert stats["rejected"] == 1 and stats["queue_depth"] == 0
+
+
+def test_queued_request_times_out_while_a_batch_is_running():
+    llm = _FakeLLM()
+
+    async def run():
+        scheduler = GenerationScheduler(llm, max_concurrency=1, queue_timeout_sec=0.2)
+        first = asyncio.create_task(scheduler.generate("a"))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        with pytest.raises(GenerationRejected) as timed_out:
+            await scheduler.generate("b")
+        waited = time.monotonic() - started
+        llm.release.set()
+        result = await first
+        await asyncio.sleep(0.05)
+        stats = scheduler.stats()
+        await scheduler.close()
+        return result, timed_out.value, waited, stats
+
+    result, timed_out, waited, stats = asyncio.run(run())
+
+    assert result == "A"
+    assert timed_out.status_code == 503
+    assert waited < 1.0
+    assert llm.batches == [["a"]]
+    assert stats["timed_out"] == 1 and stats["queue_depth"] == 0 and stats["running"] == 0
+
+
+def test_idle_dispatcher_does_not_hold_a_generation_slot():
+    llm = _FakeLLM()
+    llm.release.set()
+
+    async def run():
+        scheduler = GenerationScheduler(llm, max_concurrency=1, queue_timeout_sec=0.5)
+        assert await scheduler.generate("hi") == "HI"
+        async with scheduler.slot():
+            stats = scheduler.stats()
+        await scheduler.close()
+        return stats
+
+    stats = asyncio.run(run())
+
+    assert stats["running"] == 1
+    assert stats["timed_out"] == 0
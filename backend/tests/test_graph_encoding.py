@@ -0,0 +1,34 @@
+import gzip
+import json
+
+import pytest
+
+from app.api.encoding import choose_encoding, compress_stream, dumps, encoded_response
+from app.services.graph import decode_cursor, encode_cursor
+
+
+def test_choose_encoding_respects_accept_encoding():
+    assert choose_encoding("gzip, deflate, br") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("") is None
+
+
+def test_compressed_stream_is_decodable_chunk_by_chunk():
+    lines = [dumps({"type": "node", "id": f"{i}.md"}) + b"\n" for i in range(50)]
+    chunks = list(compress_stream(iter(lines), "gzip"))
+
+    assert gzip.decompress(b"".join(chunks)) == b"".join(lines)
+    assert len(chunks) == len(lines) + 1
+
+
+def test_small_json_bodies_are_not_compressed():
+    response = encoded_response(dumps({"nodes": []}), "application/json", "gzip")
+
+    assert "content-encoding" not in response.headers
+    assert json.loads(response.body) == {"nodes": []}
+
+
+def test_cursor_round_trip_and_validation():
+    assert decode_cursor(encode_cursor("Projects/Roadmap ü.md")) == "Projects/Roadmap ü.md"
+    with pytest.raises(ValueError):
+        decode_cursor("%%%")
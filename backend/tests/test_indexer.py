@@ -0,0 +1,246 @@
+import asyncio
+from pathlib import Path
+
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.bm25 import BM25Index
+from app.services.docstore import DocumentStore
+from app.services.indexer import VaultIndexer
+from app.services.link_graph import LinkGraph
+from app.services.manifest import IndexManifest
+from app.services.qdrant_service import point_id
+from app.services.query_cache import IndexGeneration, TTLCache
+from app.services.rag import RAGService
+from app.services.workers import ParsePool
+
+NOTE = """---
+tags: [{tags}]
+---
+# Alpha
+alpha text one
+
+# Beta
+{beta}
+
+# Gamma
+gamma text three
+"""
+
+
+class _Embedder:
+    model_key = "fake"
+    dimension = 3
+
+    def __init__(self):
+        self.texts: list[str] = []
+
+    def embed(self, texts: list[str], cache: bool = True) -> list[list[float]]:
+        self.texts.extend(texts)
+        return [[1.0, 0.0, 0.0] for _ in texts]
+
+    def flush_cache(self) -> None:
+        pass
+
+
+class _Qdrant:
+    def __init__(self):
+        self.points: dict[str, dict] = {}
+        self.upserted: list[str] = []
+        self.deleted: list[str] = []
+        self.patched: list[tuple[list[str], dict]] = []
+        self.searches = 0
+
+    async def upsert_chunks(self, points: list[dict]) -> None:
+        for point in points:
+            pid = point_id(point["chunk_id"])
+            self.points[pid] = dict(point["payload"])
+            self.upserted.append(pid)
+
+    async def delete_file(self, file_path: str, keep: list[str] | None = None) -> None:
+        for pid in [p for p, payload in self.points.items() if payload["file_path"] == file_path]:
+            if pid not in (keep or []):
+                del self.points[pid]
+
+    async def delete_points(self, point_ids: list[str], file_path: str) -> None:
+        self.deleted.extend(point_ids)
+        for pid in point_ids:
+            self.points.pop(pid, None)
+
+    async def set_payloads(self, updates: list[tuple[list[str], dict]], file_path: str) -> None:
+        for pids, payload in updates:
+            self.patched.append((pids, payload))
+            for pid in pids:
+                self.points[pid].update(payload)
+
+    async def search(self, vector: list[float], limit: int, query_filter=None) -> list[tuple[str, float]]:
+        self.searches += 1
+        return [(pid, 1.0) for pid in list(self.points)[:limit]]
+
+    async def flush(self) -> None:
+        pass
+
+    async def count(self) -> int:
+        return len(self.points)
+
+    async def reset_collection(self, vector_size: int) -> None:
+        self.points.clear()
+
+
+class _LLM:
+    prompt_budget = 512
+
+    def count_tokens(self, text: str) -> int:
+        return len(text.split())
+
+
+class _Env:
+    def __init__(self, tmp_path: Path):
+        self.vault = tmp_path / "vault"
+        self.vault.mkdir()
+        self.embedder = _Embedder()
+        self.qdrant = _Qdrant()
+        self.store = DocumentStore()
+        self.bm25 = BM25Index()
+        self.generation = IndexGeneration()
+        self.parse_pool = ParsePool(900, 0, workers=1)
+        self.indexer = VaultIndexer(
+            self.vault,
+            self.parse_pool,
+            self.embedder,
+            self.qdrant,
+            IndexManifest(tmp_path / "manifest.json", "docs", "fake"),
+            self.store,
+            self.bm25,
+            LinkGraph(),
+            self.generation,
+            SemanticAnswerCache(0),
+        )
+
+    def write(self, name: str, text: str) -> Path:
+        path = self.vault / name
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def chunk_ids(self, file_rel: str) -> dict[str, str]:
+        record = self.indexer.manifest.get(file_rel)
+        texts = self.store.chunk_texts(record.point_ids)
+        return {texts[pid].split()[1].lower(): pid for pid in record.point_ids}
+
+    def lines(self, pid: str) -> tuple[int, int]:
+        source = self.store.sources([(pid, 1.0)])[0]
+        return source.line_start, source.line_end
+
+    async def close(self) -> None:
+        await self.indexer.close()
+        self.parse_pool.shutdown()
+
+
+def _run(tmp_path: Path, scenario) -> None:
+    async def main():
+        env = _Env(tmp_path)
+        try:
+            await scenario(env)
+        finally:
+            await env.close()
+
+    asyncio.run(main())
+
+
+def test_editing_one_section_reembeds_only_the_changed_chunk(tmp_path: Path):
+    async def scenario(env: _Env):
+        note = env.write("note.md", NOTE.format(tags="a", beta="beta text two"))
+        await env.indexer.full_index()
+        before = env.chunk_ids("note.md")
+        gamma_lines = env.lines(before["gamma"])
+        env.embedder.texts.clear()
+
+        env.write("note.md", NOTE.format(tags="b", beta="beta text changed\nwith a second line"))
+        await env.indexer.index_file(note)
+        after = env.chunk_ids("note.md")
+
+        assert len(env.embedder.texts) == 1 and "beta text changed" in env.embedder.texts[0]
+        assert env.qdrant.deleted == [before["beta"]]
+        assert after["alpha"] == before["alpha"] and after["gamma"] == before["gamma"]
+        assert env.lines(after["gamma"]) == (gamma_lines[0] + 1, gamma_lines[1] + 1)
+        patched = {pid: payload for pids, payload in env.qdrant.patched for pid in pids}
+        assert set(patched) == {before["alpha"], before["gamma"]}
+        assert all(payload["tags"] == ["b"] for payload in patched.values())
+        assert env.qdrant.points[after["beta"]]["tags"] == ["b"]
+
+    _run(tmp_path, scenario)
+
+
+def test_full_index_skips_unchanged_reindexes_changed_and_removes_deleted_files(tmp_path: Path):
+    async def scenario(env: _Env):
+        env.write("keep.md", "# Keep\nkept note\n")
+        env.write("edit.md", "# Edit\nfirst draft\n")
+        gone = env.write("gone.md", "# Gone\nzephyr note\n")
+        await env.indexer.full_index()
+        gone_ids = env.indexer.manifest.get("gone.md").point_ids
+        assert env.bm25.search("zephyr", 5)
+        env.embedder.texts.clear()
+
+        env.write("edit.md", "# Edit\nsecond and longer draft\n")
+        gone.unlink()
+        stats = await env.indexer.full_index()
+
+        assert (stats.files_skipped, stats.files_indexed, stats.files_removed) == (1, 1, 1)
+        assert len(env.embedder.texts) == 1 and "second and longer draft" in env.embedder.texts[0]
+        assert "longer" in env.store.chunk_texts(env.indexer.manifest.get("edit.md").point_ids).popitem()[1]
+        assert env.indexer.manifest.get("gone.md") is None
+        assert all(payload["file_path"] != "gone.md" for payload in env.qdrant.points.values())
+        assert env.store.chunk_texts(gone_ids) == {}
+        assert env.bm25.search("zephyr", 5) == []
+
+    _run(tmp_path, scenario)
+
+
+def test_full_index_rebuilds_when_the_collection_is_empty(tmp_path: Path):
+    async def scenario(env: _Env):
+        env.write("note.md", "# Note\nsome text\n")
+        await env.indexer.full_index()
+        env.qdrant.points.clear()
+        env.embedder.texts.clear()
+
+        stats = await env.indexer.full_index()
+
+        assert (stats.files_indexed, stats.files_skipped) == (1, 0)
+        assert len(env.embedder.texts) == 1
+        assert set(env.qdrant.points) == set(env.indexer.manifest.get("note.md").point_ids)
+
+    _run(tmp_path, scenario)
+
+
+def test_reindexing_invalidates_cached_retrieval_results(tmp_path: Path):
+    async def scenario(env: _Env):
+        rag = RAGService(
+            env.embedder,
+            env.qdrant,
+            _LLM(),
+            None,
+            env.store,
+            env.bm25,
+            env.generation,
+            SemanticAnswerCache(0),
+            3,
+            results_cache=TTLCache(16),
+        )
+        note = env.write("note.md", "# Note\nold text\n")
+        await env.indexer.full_index()
+        try:
+            first = await rag.retrieve(rag.context("what changed?"))
+            assert await rag.retrieve(rag.context("what changed?")) == first
+            assert env.qdrant.searches == 1 and rag.results_cache.hits == 1
+
+            env.write("note.md", "# Note\nnew text\n")
+            await env.indexer.index_file(note)
+            second = await rag.retrieve(rag.context("what changed?"))
+            assert env.qdrant.searches == 2
+            assert "new text" in second[0].snippet
+
+            await env.indexer.remove_file(note)
+            assert await rag.retrieve(rag.context("what changed?")) == []
+            assert env.qdrant.searches == 3
+        finally:
+            await rag.batcher.close()
+
+    _run(tmp_path, scenario)
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import router
+from app.models.schemas import IndexStats
+from app.services.jobs import IndexJobRunner
+
+
+class _Indexer:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.release = asyncio.Event()
+        self.calls: list[bool] = []
+        self._lock = asyncio.Lock()
+
+    async def full_index(self, force_full=False, progress=None, on_start=None) -> IndexStats:
+        async with self._lock:
+            on_start()
+            self.calls.append(force_full)
+            progress.files = [Path("a.md"), Path("b.md")]
+            progress.files_indexed = 1
+            await self.release.wait()
+            if self.fail:
+                raise RuntimeError("vault unreadable")
+            progress.files_indexed = 2
+            progress.chunks_indexed = 5
+            return IndexStats(
+                files_seen=2,
+                files_indexed=2,
+                chunks_indexed=5,
+                files_skipped=0,
+                files_removed=0,
+                finished_at=datetime.utcnow(),
+            )
+
+
+def test_jobs_run_in_background_and_one_at_a_time():
+    async def scenario():
+        indexer = _Indexer()
+        jobs = IndexJobRunner(indexer)
+        first = jobs.submit()
+        second = jobs.submit(force_full=True)
+        await asyncio.sleep(0.01)
+
+        assert first.to_status().status == "running"
+        assert first.to_status().progress.files_seen == 2
+        assert first.to_status().progress.files_processed == 1
+        assert second.status == "queued"
+
+        indexer.release.set()
+        await asyncio.gather(first.task, second.task)
+        assert first.status == second.status == "completed"
+        assert first.stats.chunks_indexed == 5
+        assert first.finished_at is not None
+        assert indexer.calls == [False, True]
+
+    asyncio.run(scenario())
+
+
+def test_job_failures_and_shutdown_are_reported():
+    async def scenario():
+        failing = _Indexer(fail=True)
+        jobs = IndexJobRunner(failing)
+        job = jobs.submit()
+        failing.release.set()
+        await job.task
+        assert job.status == "failed"
+        assert job.error == "vault unreadable"
+
+        stuck = IndexJobRunner(_Indexer())
+        running = stuck.submit()
+        await asyncio.sleep(0.01)
+        await stuck.shutdown()
+        assert running.status == "cancelled"
+
+    asyncio.run(scenario())
+
+
+def test_job_history_keeps_unfinished_jobs():
+    async def scenario():
+        indexer = _Indexer()
+        jobs = IndexJobRunner(indexer, history=1)
+        first = jobs.submit()
+        second = jobs.submit()
+        assert set(jobs.jobs) == {first.job_id, second.job_id}
+        indexer.release.set()
+        await asyncio.gather(first.task, second.task)
+        third = jobs.submit()
+        await third.task
+        assert list(jobs.jobs) == [third.job_id]
+
+    asyncio.run(scenario())
+
+
+def test_index_endpoints_return_a_job_and_its_status():
+    app = FastAPI()
+    app.include_router(router)
+    indexer = _Indexer()
+    indexer.release.set()
+
+    with TestClient(app) as client:
+        app.state.container = SimpleNamespace(jobs=IndexJobRunner(indexer))
+        response = client.post("/index", json={"force_full": True})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        for _ in range(100):
+            status = client.get(f"/index/{job_id}").json()
+            if status["status"] == "completed":
+                break
+            time.sleep(0.01)
+        assert status["force_full"] is True
+        assert status["status"] == "completed"
+        assert status["stats"]["chunks_indexed"] == 5
+        assert client.get("/index/unknown").status_code == 404
@@ -0,0 +1,73 @@
+from app.services.docstore import DocumentStore
+from app.services.link_graph import LinkGraph, note_aliases
+
+
+def _graph() -> LinkGraph:
+    graph = LinkGraph()
+    graph.update("index.md", "Index", ["Projects/Roadmap", "notes#Today", "missing"], [])
+    graph.update("Projects/Roadmap.md", "Roadmap", ["Q3 plan"], [])
+    graph.update("daily/notes.md", "Notes", ["index"], [])
+    graph.update("plans/quarter.md", "Quarter", [], ["Q3 Plan"])
+    return graph
+
+
+def test_links_resolve_by_path_stem_and_alias():
+    graph = _graph()
+
+    assert graph.outgoing("index.md") == ["Projects/Roadmap.md", "daily/notes.md"]
+    assert graph.outgoing("Projects/Roadmap.md") == ["plans/quarter.md"]
+    assert graph.backlinks("plans/quarter.md") == ["Projects/Roadmap.md"]
+    assert graph.find("roadmap") == "Projects/Roadmap.md"
+
+
+def test_updates_and_removals_are_incremental():
+    graph = _graph()
+    graph.update("index.md", "Index", ["quarter"], [])
+    graph.remove("daily/notes.md")
+
+    assert graph.outgoing("index.md") == ["plans/quarter.md"]
+    assert graph.backlinks("plans/quarter.md") == ["Projects/Roadmap.md", "index.md"]
+    assert graph.backlinks("index.md") == []
+    assert ("daily/notes.md", "index.md") not in graph.edges()
+
+
+def test_neighborhood_follows_k_hops():
+    graph = _graph()
+
+    nodes, edges = graph.neighborhood("index.md", depth=1, direction="out")
+    assert nodes == ["Projects/Roadmap.md", "daily/notes.md", "index.md"]
+    assert ("daily/notes.md", "index.md") in edges
+
+    nodes, _ = graph.neighborhood("index.md", depth=2, direction="out")
+    assert "plans/quarter.md" in nodes
+    nodes, _ = graph.neighborhood("plans/quarter.md", depth=1, direction="in")
+    assert nodes == ["Projects/Roadmap.md", "plans/quarter.md"]
+
+
+def test_page_walks_sorted_notes_with_a_cursor():
+    graph = _graph()
+
+    first, last = graph.page(None, 3)
+    rest, end = graph.page(last, 3)
+
+    assert first + rest == sorted(path for path, _ in graph.nodes())
+    assert end is None
+    assert graph.edges_from(rest) == [("plans/quarter.md", t) for t in graph.outgoing("plans/quarter.md")]
+
+
+def test_note_aliases_ignores_malformed_frontmatter():
+    assert note_aliases({"aliases": "Home"}) == ["Home"]
+    assert note_aliases({"alias": ["Home", None, " ", 2024]}) == ["Home", "2024"]
+    assert note_aliases({"aliases": 2024}) == []
+    assert note_aliases({"aliases": {"a": 1}}) == []
+    assert note_aliases({"aliases": None}) == []
+
+
+def test_graph_loads_documents_with_scalar_aliases():
+    store = DocumentStore()
+    store.write_file("a.md", {"title": "A", "links": ["b"], "frontmatter": {"aliases": 2024}}, [], [], [])
+
+    graph = LinkGraph()
+    graph.load(store.link_rows())
+
+    assert graph.nodes() == [("a.md", "A")]
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.classifier import PROMPT_TEMPLATES
+from app.services.llm_service import LocalLLMService
+from app.services.rag import SUMMARY_PREFIX, RAGService
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+PROMPT = "Context:\n\nQuestion: what is in my notes?\n\nAnswer:"
+
+
+def _tiny_llm() -> LocalLLMService:
+    bpe = tokenizers.Tokenizer(tokenizers.models.BPE())
+    bpe.pre_tokenizer = tokenizers.pre_tokenizers.ByteLevel(add_prefix_space=False)
+    bpe.decoder = tokenizers.decoders.ByteLevel()
+    trainer = tokenizers.trainers.BpeTrainer(
+        vocab_size=400,
+        special_tokens=["<|endoftext|>"],
+        initial_alphabet=tokenizers.pre_tokenizers.ByteLevel.alphabet(),
+    )
+    bpe.train_from_iterator([PROMPT, "Context:\n\n"] * 50, trainer)
+    tokenizer = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=bpe, eos_token="<|endoftext|>", pad_token="<|endoftext|>"
+    )
+    torch.manual_seed(0)
+    config = transformers.GPT2Config(vocab_size=len(tokenizer), n_positions=128, n_embd=32, n_layer=2, n_head=2)
+    model = transformers.GPT2LMHeadModel(config).eval()
+    llm = LocalLLMService("tiny-gpt2", max_new_tokens=8)
+    llm._generator = SimpleNamespace(model=model, tokenizer=tokenizer)
+    return llm
+
+
+def _greedy(llm: LocalLLMService, inputs: dict) -> list[int]:
+    with torch.no_grad():
+        output = llm.generator.model.generate(
+            **inputs, max_new_tokens=8, do_sample=False, pad_token_id=llm.generator.tokenizer.eos_token_id
+        )
+    return output[0, inputs["input_ids"].shape[1] :].tolist()
+
+
+def test_prefix_cache_matches_uncached_greedy_generation():
+    llm = _tiny_llm()
+    cached = llm._inputs(PROMPT, "Context:")
+
+    assert "past_key_values" in cached
+    assert torch.equal(cached["input_ids"], llm._inputs(PROMPT)["input_ids"])
+    assert _greedy(llm, cached) == _greedy(llm, llm._inputs(PROMPT))
+
+
+def test_prefix_cache_is_used_for_prefixes_ending_in_blank_lines():
+    llm = _tiny_llm()
+    prefix = "Context:\n\n"
+    merged = llm.generator.tokenizer(prefix, return_tensors="pt").input_ids
+    full_ids = llm._inputs(PROMPT)["input_ids"]
+    assert not torch.equal(full_ids[0, : merged.shape[1]], merged[0])
+
+    cached = llm._inputs(PROMPT, prefix)
+    assert "past_key_values" in cached
+    assert torch.equal(cached["input_ids"], full_ids)
+    assert _greedy(llm, cached) == _greedy(llm, llm._inputs(PROMPT))
+
+
+def test_prefix_cache_falls_back_when_prefix_tokens_merge_across_the_boundary():
+    llm = _tiny_llm()
+    prefix = "Context:\n\nQues"
+    prefix_ids, _ = llm.prefix_state(prefix)
+    full_ids = llm._inputs(PROMPT)["input_ids"]
+    assert not torch.equal(full_ids[0, : prefix_ids.shape[1]], prefix_ids[0])
+
+    inputs = llm._inputs(PROMPT, prefix)
+    assert "past_key_values" not in inputs
+    assert _greedy(llm, inputs) == _greedy(llm, llm._inputs(PROMPT))
+
+
+def test_shipped_prompt_prefixes_hit_the_cache():
+    llm = _tiny_llm()
+    prefixes = [RAGService._prompt_prefix(label) for label in PROMPT_TEMPLATES] + [SUMMARY_PREFIX]
+
+    for prefix in prefixes:
+        assert prefix.endswith("\n\n")
+        assert "past_key_values" in llm._inputs(prefix + "Question:\nwhat is due?\n\nAnswer:", prefix)
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import queue
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import router
+from app.main import generation_rejected
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.bm25 import BM25Index
+from app.services.docstore import DocumentStore
+from app.services.generation import GenerationRejected
+from app.services.llm_service import TokenStream
+from app.services.priority import InteractiveGate
+from app.services.query_cache import IndexGeneration
+from app.services.rag import RAGService
+
+
+class _QueueStreamer:
+    def __init__(self, timeout: float | None = None):
+        self.queue: queue.Queue = queue.Queue()
+        self.timeout = timeout
+
+    def put(self, text: str) -> None:
+        self.queue.put(text)
+
+    def end(self) -> None:
+        self.queue.put(None)
+
+    def __next__(self) -> str:
+        text = self.queue.get(timeout=self.timeout)
+        if text is None:
+            raise StopIteration
+        return text
+
+
+def _generate(fail: bool = False, stall: threading.Event | None = None):
+    def generate(streamer, **kwargs):
+        streamer.put("Hello")
+        streamer.put(" world")
+        if stall is not None:
+            stall.wait()
+        if fail:
+            raise RuntimeError("CUDA out of memory")
+        streamer.end()
+
+    return generate
+
+
+def _stream(generate, timeout: float | None = 2.0) -> TokenStream:
+    stream = TokenStream(_QueueStreamer(timeout), threading.Event())
+    stream.start(generate)
+    return stream
+
+
+def test_token_stream_yields_text_until_end():
+    assert list(_stream(_generate())) == ["Hello", " world"]
+
+
+def test_token_stream_surfaces_generation_errors():
+    stream = _stream(_generate(fail=True))
+
+    assert next(stream) == "Hello"
+    assert next(stream) == " world"
+    with pytest.raises(RuntimeError, match="out of memory"):
+        next(stream)
+
+
+def test_token_stream_times_out_and_cancels_a_stalled_generation():
+    release = threading.Event()
+    stream = _stream(_generate(stall=release), timeout=0.05)
+    try:
+        assert [next(stream), next(stream)] == ["Hello", " world"]
+        with pytest.raises(TimeoutError):
+            next(stream)
+        assert stream._cancelled.is_set()
+    finally:
+        release.set()
+
+
+class _LLM:
+    prompt_budget = 500
+
+    def __init__(self, fail: bool):
+        self.fail = fail
+
+    def count_tokens(self, text: str) -> int:
+        return len(text.split())
+
+    def stream(self, prompt: str, prefix: str | None = None) -> TokenStream:
+        return _stream(_generate(fail=self.fail))
+
+
+def _rag(fail: bool) -> RAGService:
+    class Embedder:
+        def embed(self, texts, cache=True):
+            return [[1.0, 0.0] if "new" in text else [0.0, 1.0] for text in texts]
+
+    class Qdrant:
+        async def search(self, vector, limit, query_filter=None):
+            return []
+
+    class Classifier:
+        def classify(self, text, vector=None):
+            return "general", 0.5, {"general": 0.5}
+
+    return RAGService(
+        Embedder(),
+        Qdrant(),
+        _LLM(fail),
+        Classifier(),
+        DocumentStore(),
+        BM25Index(),
+        IndexGeneration(),
+        SemanticAnswerCache(0),
+        3,
+    )
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def _client(fail: bool) -> TestClient:
+    app = FastAPI()
+    app.include_router(router)
+    app.add_exception_handler(GenerationRejected, generation_rejected)
+    rag = _rag(fail)
+    app.state.container = SimpleNamespace(rag=rag, gate=InteractiveGate())
+    return TestClient(app)
+
+
+def test_query_stream_sends_tokens_then_done():
+    events = _events(_client(fail=False).post("/query/stream", json={"query": "what is new"}).text)
+
+    assert [e for e, _ in events] == ["sources", "token", "token", "done"]
+    assert events[-1][1]["answer"] == "Hello world"
+
+
+def test_query_stream_reports_generation_failure_instead_of_hanging():
+    events = _events(_client(fail=True).post("/query/stream", json={"query": "what is new"}).text)
+
+    assert [e for e, _ in events] == ["sources", "token", "token", "error"]
+    assert "out of memory" in events[-1][1]["detail"]
+
+
+def test_answer_stream_releases_the_generation_slot_after_a_failure():
+    rag = _rag(fail=True)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            async for _ in rag.answer_stream("what is new"):
+                pass
+        return rag.scheduler.stats()
+
+    stats = asyncio.run(run())
+    assert stats["running"] == 0
+    assert stats["queue_depth"] == 0
+
+
+def test_query_stream_rejects_when_full_but_serves_cached_answers():
+    client = _client(fail=False)
+    rag = client.app.state.container.rag
+    rag.answer_cache = SemanticAnswerCache(8)
+    assert client.post("/query/stream", json={"query": "what is new"}).status_code == 200
+
+    rag.scheduler.max_queue = 0
+    cached = client.post("/query/stream", json={"query": "what is new"})
+    assert _events(cached.text)[-1][1]["cached"] is True
+
+    rejected = client.post("/query/stream", json={"query": "something else entirely"})
+    assert rejected.status_code == 429
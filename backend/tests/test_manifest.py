@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+from app.services.manifest import FileRecord, IndexManifest
+
+
+def test_manifest_round_trip_and_change_detection(tmp_path: Path):
+    path = tmp_path / "manifest.json"
+    manifest = IndexManifest(path, "docs", "model-a")
+    manifest.update("a.md", FileRecord(mtime=1.0, size=10, content_hash="abc", chunks={"p1": [1, 4]}))
+    manifest.save()
+
+    reloaded = IndexManifest(path, "docs", "model-a")
+
+    assert reloaded.get("a.md").point_ids == ["p1"]
+    assert reloaded.is_unchanged("a.md", 1.0, 10)
+    assert not reloaded.is_unchanged("a.md", 2.0, 10)
+    assert not reloaded.is_unchanged("b.md", 1.0, 10)
+
+
+def test_manifest_discarded_when_model_changes(tmp_path: Path):
+    path = tmp_path / "manifest.json"
+    manifest = IndexManifest(path, "docs", "model-a")
+    manifest.update("a.md", FileRecord(mtime=1.0, size=10, content_hash="abc"))
+    manifest.save()
+
+    assert len(IndexManifest(path, "docs", "model-b")) == 0
+
+
+def test_manifest_marks_outdated_versions_as_stale(tmp_path: Path):
+    path = tmp_path / "manifest.json"
+    manifest = IndexManifest(path, "docs", "model-a")
+    manifest.update("a.md", FileRecord(mtime=1.0, size=10, content_hash="abc"))
+    manifest.save()
+    assert not IndexManifest(path, "docs", "model-a").stale
+
+    raw = json.loads(path.read_text())
+    raw["version"] -= 1
+    path.write_text(json.dumps(raw))
+    outdated = IndexManifest(path, "docs", "model-a")
+
+    assert outdated.stale
+    assert len(outdated) == 0
+    assert not IndexManifest(tmp_path / "missing.json", "docs", "model-a").stale
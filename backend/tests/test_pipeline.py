@@ -0,0 +1,62 @@
+import asyncio
+from pathlib import Path
+
+from app.services.chunker import Chunk
+from app.services.manifest import FileRecord
+from app.services.pipeline import FilePlan, IndexPipeline
+
+
+class _Embedder:
+    def embed(self, texts: list[str], cache: bool = True) -> list[list[float]]:
+        return [[1.0, 0.0] for _ in texts]
+
+
+class _Qdrant:
+    def __init__(self):
+        self.points = []
+
+    async def upsert_chunks(self, points: list[dict]) -> None:
+        self.points.extend(points)
+
+    async def flush(self) -> None:
+        pass
+
+
+def _plan(file_rel: str, added: int = 0, removed: int = 0, moved: int = 0) -> FilePlan:
+    return FilePlan(
+        file_rel=file_rel,
+        record=FileRecord(mtime=1.0, size=1, content_hash=file_rel),
+        meta={},
+        document={},
+        added=[Chunk(f"{file_rel}:{i}", "text", None, i, i) for i in range(added)],
+        removed=[f"{file_rel}:old{i}" for i in range(removed)],
+        moved=[(f"{file_rel}:m{i}", i + 1, i + 1) for i in range(moved)],
+        patches=[],
+        replace=False,
+    )
+
+
+def test_pipeline_counts_every_finalized_plan():
+    plans = {
+        "edited.md": _plan("edited.md", added=3, removed=1),
+        "trimmed.md": _plan("trimmed.md", removed=2),
+        "shifted.md": _plan("shifted.md", moved=1),
+        "same.md": None,
+    }
+    finalized = []
+
+    async def plan_file(path: Path, force: bool) -> FilePlan | None:
+        return plans[path.name]
+
+    async def finalize(plan: FilePlan) -> None:
+        finalized.append(plan.file_rel)
+
+    qdrant = _Qdrant()
+    pipeline = IndexPipeline(plan_file, finalize, _Embedder(), qdrant, 2, 2, 2)
+    result = asyncio.run(pipeline.run(lambda: [Path(name) for name in plans], False))
+
+    assert sorted(finalized) == ["edited.md", "shifted.md", "trimmed.md"]
+    assert result.files_indexed == 3
+    assert result.files_skipped == 1
+    assert result.chunks_indexed == 3
+    assert len(qdrant.points) == 3
@@ -0,0 +1,44 @@
+import pytest
+from qdrant_client.http.models import BinaryQuantization, ScalarQuantization
+
+from app.services.qdrant_service import QdrantService
+
+
+def _service(**kwargs) -> QdrantService:
+    return QdrantService("http://localhost:6333", "test", **kwargs)
+
+
+def test_search_params_use_configured_ef_and_quantization():
+    params = _service(search_ef=128, quantization="scalar", rescore=True, oversampling=3.0).search_params()
+
+    assert params.hnsw_ef == 128
+    assert params.exact is False
+    assert params.quantization.rescore is True
+    assert params.quantization.oversampling == 3.0
+    assert params.quantization.ignore in (None, False)
+
+
+def test_search_params_overrides_and_unquantized_defaults():
+    quantized = _service(quantization="binary", rescore=True)
+    assert quantized.search_params(ef=32, rescore=False).hnsw_ef == 32
+    assert quantized.search_params(ef=32, rescore=False).quantization.rescore is False
+
+    plain = _service().search_params()
+    assert plain.hnsw_ef is None
+    assert plain.quantization is None
+
+
+def test_exact_search_ignores_quantized_vectors():
+    params = _service(search_ef=128, quantization="scalar").search_params(exact=True)
+
+    assert params.exact is True
+    assert params.hnsw_ef is None
+    assert params.quantization.ignore is True
+
+
+def test_quantization_config_matches_mode():
+    assert isinstance(_service(quantization="scalar")._quantization_config(), ScalarQuantization)
+    assert isinstance(_service(quantization="binary")._quantization_config(), BinaryQuantization)
+    assert _service()._quantization_config() is None
+    with pytest.raises(ValueError):
+        _service(quantization="pq")
@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from app.services.qdrant_service import QdrantService, QdrantWriteError
+
+
+class _FailingClient:
+    def __init__(self):
+        self.closed = False
+
+    async def upsert(self, **kwargs):
+        raise RuntimeError("connection reset")
+
+    async def delete(self, **kwargs):
+        return None
+
+    async def close(self):
+        self.closed = True
+
+
+def test_failed_writes_report_their_files_and_close_still_closes_the_client():
+    async def run():
+        qdrant = QdrantService("http://localhost:6333", "test")
+        qdrant.client = _FailingClient()
+        await qdrant.upsert_chunks(
+            [{"chunk_id": "a::1", "vector": [0.1], "payload": {"file_path": "a.md"}}]
+        )
+        await qdrant.delete_points(["p1"], "b.md")
+        with pytest.raises(QdrantWriteError) as err:
+            await qdrant.flush()
+        assert err.value.files == {"a.md"}
+
+        await qdrant.upsert_chunks(
+            [{"chunk_id": "c::1", "vector": [0.1], "payload": {"file_path": "c.md"}}]
+        )
+        with pytest.raises(QdrantWriteError):
+            await qdrant.close()
+        return qdrant.client.closed
+
+    assert asyncio.run(run())
@@ -0,0 +1,24 @@
+from app.services.query_cache import TTLCache, normalize_query
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats()["hits"] == 2
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(max_entries=4, ttl_sec=-1)
+    cache.put("a", 1)
+
+    assert cache.get("a") is None
+
+
+def test_normalize_query_collapses_whitespace():
+    assert normalize_query("  what   is\n this ") == "what is this"
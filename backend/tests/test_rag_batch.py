@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.bm25 import BM25Index
+from app.services.docstore import DocumentStore
+from app.services.query_cache import IndexGeneration
+from app.services.rag import RAGService
+
+
+class _Embedder:
+    def embed(self, texts, cache=True):
+        return [[1.0, 0.0] for _ in texts]
+
+
+class _FailingQdrant:
+    async def search_batch(self, vectors, limits, filters):
+        await asyncio.sleep(0)
+        raise RuntimeError("qdrant down")
+
+
+class _LLM:
+    def count_tokens(self, text: str) -> int:
+        return len(text.split())
+
+
+def test_retrieve_batch_propagates_search_errors_without_leaking_keyword_tasks():
+    bm25 = BM25Index()
+    bm25.add("a.md", [("p1", "tides and moons")])
+    rag = RAGService(
+        _Embedder(), _FailingQdrant(), _LLM(), None, DocumentStore(), bm25, IndexGeneration(), SemanticAnswerCache(0), 3
+    )
+
+    async def scenario():
+        ctxs = [rag.context("tides", mode="hybrid"), rag.context("moons", mode="dense")]
+        with pytest.raises(RuntimeError, match="qdrant down"):
+            await rag.retrieve_batch(ctxs)
+        await rag.batcher.close()
+        return {task for task in asyncio.all_tasks() if task is not asyncio.current_task()}
+
+    assert asyncio.run(scenario()) == set()
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.bm25 import BM25Index
+from app.services.docstore import DocumentStore
+from app.services.query_cache import IndexGeneration
+from app.services.rag import RAGService
+
+
+class _Embedder:
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def embed(self, texts, cache=True):
+        self.calls.append(list(texts))
+        return [[0.6, 0.8] for _ in texts]
+
+
+class _Qdrant:
+    def __init__(self):
+        self.searching = threading.Event()
+        self.vectors = []
+
+    async def search(self, vector, limit, query_filter=None):
+        self.vectors.append(vector)
+        self.searching.set()
+        await asyncio.sleep(0.05)
+        return []
+
+
+class _Classifier:
+    def __init__(self, qdrant: _Qdrant):
+        self.qdrant = qdrant
+        self.vectors = []
+        self.overlapped = False
+
+    def classify(self, text, vector=None):
+        self.vectors.append(vector)
+        self.overlapped = self.qdrant.searching.wait(timeout=2)
+        return "task", 0.9, {"task": 0.9}
+
+
+class _LLM:
+    prompt_budget = 512
+
+    def count_tokens(self, text: str) -> int:
+        return len(text.split())
+
+
+class _Scheduler:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate(self, prompt: str, prefix: str | None = None) -> str:
+        self.prompts.append(prompt)
+        return "answer"
+
+
+def test_answer_embeds_once_and_routes_while_retrieving():
+    embedder = _Embedder()
+    qdrant = _Qdrant()
+    classifier = _Classifier(qdrant)
+    scheduler = _Scheduler()
+    rag = RAGService(
+        embedder,
+        qdrant,
+        _LLM(),
+        classifier,
+        DocumentStore(),
+        BM25Index(),
+        IndexGeneration(),
+        SemanticAnswerCache(0),
+        3,
+        scheduler=scheduler,
+    )
+
+    async def scenario():
+        try:
+            return await rag.answer("what is due this week?")
+        finally:
+            await rag.batcher.close()
+
+    response = asyncio.run(scenario())
+
+    assert embedder.calls == [["what is due this week?"]]
+    assert classifier.vectors == qdrant.vectors == [[0.6, 0.8]]
+    assert classifier.overlapped
+    assert response.route == "task"
+    assert response.answer == "answer"
+    assert {"embed_ms", "route_ms", "search_ms"} <= set(response.timings)
+    assert scheduler.prompts[0].rstrip().endswith("Answer:")
@@ -0,0 +1,89 @@
+import asyncio
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import router
+from app.services.container import warmup
+from app.services.readiness import Readiness
+
+
+class _FlakyQdrant:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    async def ensure_collection(self, dimension: int) -> None:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("qdrant unreachable")
+
+
+class _Jobs:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, force_full: bool = False):
+        self.submitted.append(force_full)
+        return SimpleNamespace(job_id="job-1")
+
+
+def _container(qdrant: _FlakyQdrant) -> SimpleNamespace:
+    return SimpleNamespace(
+        readiness=Readiness(["embedder", "qdrant", "classifier", "llm"], retry_delay=0.01, max_retry_delay=0.02),
+        embedder=SimpleNamespace(load=lambda: None, dimension=4),
+        qdrant=qdrant,
+        jobs=_Jobs(),
+        classifier=SimpleNamespace(load=lambda: None),
+        llm=SimpleNamespace(load=lambda: None, warm_prefixes=lambda prefixes: None),
+        rag=SimpleNamespace(prompt_prefixes=lambda: []),
+    )
+
+
+def test_readiness_reports_failures_without_retry():
+    readiness = Readiness(["a"])
+
+    def fail():
+        raise RuntimeError("boom")
+
+    assert asyncio.run(readiness.run("a", fail)) is False
+    assert readiness.snapshot()["a"].status == "failed"
+    assert readiness.snapshot()["a"].error == "boom"
+    assert not readiness.ready
+
+
+def test_warmup_retries_qdrant_and_queues_startup_index():
+    container = _container(_FlakyQdrant(failures=3))
+    asyncio.run(warmup(container))
+
+    assert container.qdrant.calls == 4
+    assert container.jobs.submitted == [False]
+    assert container.readiness.ready
+    assert container.readiness.snapshot()["qdrant"].error is None
+
+
+def test_ready_endpoint_reports_retrying_component_until_it_recovers():
+    app = FastAPI()
+    app.include_router(router)
+    container = _container(_FlakyQdrant(failures=10**6))
+    app.state.container = container
+
+    async def scenario():
+        task = asyncio.create_task(warmup(container))
+        await asyncio.sleep(0.1)
+        with TestClient(app) as client:
+            response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["components"]["qdrant"]["status"] == "retrying"
+        assert container.jobs.submitted == []
+
+        container.qdrant.failures = 0
+        await asyncio.wait_for(task, 1)
+        with TestClient(app) as client:
+            response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
+        assert container.jobs.submitted == [False]
+
+    asyncio.run(scenario())
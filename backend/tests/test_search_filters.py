@@ -0,0 +1,44 @@
+from datetime import date, datetime
+
+from app.models.schemas import SearchFilters
+from app.services.qdrant_service import build_filter, folder_prefixes, frontmatter_terms, note_tags
+
+
+def test_payload_helpers_flatten_folders_and_frontmatter():
+    assert folder_prefixes("projects/alpha/plan.md") == ["projects", "projects/alpha"]
+    assert folder_prefixes("inbox.md") == []
+    assert frontmatter_terms({"status": "open", "aliases": ["a", "b"], "meta": {"x": 1}}) == [
+        "aliases=a",
+        "aliases=b",
+        "status=open",
+    ]
+    assert frontmatter_terms({"due": date(2024, 5, 1), "seen": [datetime(2024, 5, 1, 9, 30)]}) == [
+        "due=2024-05-01",
+        "seen=2024-05-01T09:30:00",
+    ]
+
+
+def test_note_tags_merge_inline_and_frontmatter_tags():
+    assert note_tags(["inline"], {"tags": ["x", "#y", None, 3]}) == ["3", "inline", "x", "y"]
+    assert note_tags([], {"tags": "a, b c"}) == ["a", "b", "c"]
+    assert note_tags(["a"], {"tag": "a"}) == ["a"]
+    assert note_tags([], {"tags": None}) == []
+
+
+def test_build_filter_maps_each_field_to_a_condition():
+    assert build_filter(None) is None
+    assert build_filter(SearchFilters()) is None
+
+    query_filter = build_filter(
+        SearchFilters(
+            tags=["#todo"],
+            folder="/projects/alpha/",
+            frontmatter={"status": "open"},
+            modified_after=datetime(2024, 1, 1),
+        )
+    )
+    keys = [c.key for c in query_filter.must]
+    assert keys == ["tags", "folders", "fm", "modified_at"]
+    assert query_filter.must[0].match.value == "todo"
+    assert query_filter.must[1].match.value == "projects/alpha"
+    assert query_filter.must[3].range.lte is None